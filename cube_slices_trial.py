@@ -1,5 +1,12 @@
+import hashlib
+import os
+from functools import lru_cache
+
 from manim import *
 
+from percolation import TimesStore, permutation_stack
+from percolation.core import check_perm, next_infections
+
 # ============================================================
 # CONFIG YOU SHOULD EDIT
 # ============================================================
@@ -24,14 +31,16 @@ THRESHOLD = 3
 RUN_INFECTION = True   # set False if you only want the stacking + voxel reveal
 MAX_GENERATIONS = 50   # safety cap
 
+# PERCOLATION_TIMES=runs/times reads each generation from infection times
+# memory-mapped in that percolation.TimesStore (recorded on first use)
+# instead of simulating in the scene.
+TIMES_STORE = os.environ.get("PERCOLATION_TIMES")
+
 
 # ============================================================
 # HELPERS
 # ============================================================
 
-def check_perm(p):
-    return sorted(p) == list(range(N))
-
 def grid_xy_point(r, c, spacing):
     """Map (row, col) to a point in the XY plane centered at origin."""
     x = (c - (N - 1) / 2) * spacing
@@ -45,55 +54,43 @@ def cube_xyz_point(r, c, z, spacing):
     zz = (z - (N - 1) / 2) * spacing
     return np.array([x, y, zz])
 
-def neighbors_3d(cell):
-    r, c, z = cell
-    for dr, dc, dz in [(-1,0,0),(1,0,0),(0,-1,0),(0,1,0),(0,0,-1),(0,0,1)]:
-        rr, cc, zz = r+dr, c+dc, z+dz
-        if 0 <= rr < N and 0 <= cc < N and 0 <= zz < N:
-            yield (rr, cc, zz)
 
-def next_infections(infected):
-    to_fill = set()
+@lru_cache(maxsize=1)
+def _slice_templates(square_size, spacing):
+    """(faint N×N grid, infected square) templates, built once per scene (cleared at its end)."""
+    grid_squares = VGroup()
     for r in range(N):
         for c in range(N):
-            for z in range(N):
-                cell = (r, c, z)
-                if cell in infected:
-                    continue
-                cnt = 0
-                for nb in neighbors_3d(cell):
-                    if nb in infected:
-                        cnt += 1
-                        if cnt >= THRESHOLD:
-                            to_fill.add(cell)
-                            break
-    return to_fill
+            sq = Square(side_length=square_size)
+            sq.set_stroke(WHITE, width=1)
+            sq.set_fill(BLACK, opacity=0)
+            sq.move_to(grid_xy_point(r, c, spacing))
+            grid_squares.add(sq)
+    grid_squares.set_opacity(0.45)
+
+    infected = Square(side_length=square_size)
+    infected.set_stroke(WHITE, width=1.2)
+    infected.set_fill(BLUE, opacity=0.9)
+    return grid_squares, infected
+
 
 def make_slice_group(z, perm, square_size, spacing, show_grid=True):
     """
     Build a 2D slice: optional faint 6x6 grid + the 6 infected squares from the permutation.
     Returned group is in the XY plane (z=0 initially).
     """
+    grid_template, infected_template = _slice_templates(square_size, spacing)
     g = VGroup()
     grid_squares = VGroup()
 
     if show_grid:
-        for r in range(N):
-            for c in range(N):
-                sq = Square(side_length=square_size)
-                sq.set_stroke(WHITE, width=1)
-                sq.set_fill(BLACK, opacity=0)
-                sq.move_to(grid_xy_point(r, c, spacing))
-                grid_squares.add(sq)
-        grid_squares.set_opacity(0.45)
+        grid_squares = grid_template.copy()
         g.add(grid_squares)
 
     infected_squares = []
     for r in range(N):
         c = perm[r]
-        sq = Square(side_length=square_size)
-        sq.set_stroke(WHITE, width=1.2)
-        sq.set_fill(BLUE, opacity=0.9)
+        sq = infected_template.copy()
         sq.move_to(grid_xy_point(r, c, spacing))
         infected_squares.append(sq)
         g.add(sq)
@@ -105,6 +102,22 @@ def make_slice_group(z, perm, square_size, spacing, show_grid=True):
     return g, infected_squares, grid_squares, label
 
 
+def stored_times(perms, threshold):
+    """[z, row, col] infection times of the stack, memory-mapped from TIMES_STORE."""
+    store = TimesStore(TIMES_STORE)
+    key = "cube-" + hashlib.sha1(f"{threshold}:{perms}".encode()).hexdigest()[:16]
+    try:
+        store.meta(key)  # written last, so a run cut short is recorded again
+    except FileNotFoundError:
+        store.record(key, permutation_stack(perms), threshold)
+    return store.open(key)
+
+
+def generation_cells(times, gen):
+    """Cells (r, c, z) infected at `gen`, read one z-slice of the memmap at a time."""
+    return [(r, c, z) for z in range(N) for r, c in zip(*np.nonzero(times[z] == gen))]
+
+
 def make_voxel(cell, voxel_size, spacing, color=BLUE):
     r, c, z = cell
     cube = Cube(side_length=voxel_size)
@@ -123,7 +136,7 @@ class PermutationSlicesToCube(ThreeDScene):
         # Validate perms
         assert len(PERMS) == N, f"Need exactly {N} permutations (one per z-slice)."
         for p in PERMS:
-            assert check_perm(p), f"Invalid permutation: {p} (must be a rearrangement of 0..{N-1})"
+            assert check_perm(p, N), f"Invalid permutation: {p} (must be a rearrangement of 0..{N-1})"
 
         # Visual parameters
         spacing = 0.65          # distance between grid cell centers
@@ -241,9 +254,13 @@ class PermutationSlicesToCube(ThreeDScene):
 
         # Optionally run infection in full 6x6x6 cube
         if RUN_INFECTION:
+            times = stored_times(PERMS, THRESHOLD) if TIMES_STORE else None
             gen = 0
             while gen < MAX_GENERATIONS and len(infected_cells) < N**3:
-                new_cells = next_infections(infected_cells)
+                if times is not None:
+                    new_cells = generation_cells(times, gen + 1)
+                else:
+                    new_cells = next_infections(infected_cells, N, THRESHOLD)
                 if not new_cells:
                     break
                 gen += 1
@@ -280,3 +297,6 @@ class PermutationSlicesToCube(ThreeDScene):
 
         else:
             self.wait(2.5)
+
+        # The templates hold mobjects; drop them with the scene.
+        _slice_templates.cache_clear()
@@ -1,13 +1,39 @@
+import os
+from functools import lru_cache
+
 from manim import *
 
+from percolation import grid_from_cells, infection_times, jit, summarize_times
+from percolation.core import find_next_to_fill, seed_from_diagonals
+from percolation.pacing import fill_generations, schedule
+from percolation.perimeter import perimeter_loops
+from percolation.raster import Reveal, legend
+from percolation.results import race_configs
+from percolation.sensitivity import sensitivity
+from memory_profile import MemoryProfiledScene
+from pipelined_writer import PipelinedScene
+
 # ---------------------------
 # Helpers
 # ---------------------------
 
-def make_grid(grid_size, square_size, stroke_width=1.5, y_shift=0.0):
-    """Return (grid VGroup, squares dict[(r,c)->Square])."""
+# Seconds a spread may take before generations are merged (see percolation.pacing).
+SPREAD_TARGET = 12.0
+
+# Exact minimum percolation time on the 7×7 grid (python -m percolation.tmin --n 7):
+# T(k) for every k from a key up to the next one.
+TMIN_7 = {7: 6, 8: 5, 10: 4, 12: 3, 15: 2, 21: 1, 49: 0}
+
+
+@lru_cache(maxsize=2)
+def _grid_template(grid_size, square_size, stroke_width):
+    """
+    Unshifted grid and its cell order, built once per style. A scene uses one
+    or two styles; FullVideo clears the cache at every scene boundary so no
+    template outlives the scene that built it.
+    """
     grid = VGroup()
-    squares = {}
+    cells = []
     for r in range(grid_size):
         for c in range(grid_size):
             sq = Square(side_length=square_size)
@@ -15,62 +41,106 @@ def make_grid(grid_size, square_size, stroke_width=1.5, y_shift=0.0):
             sq.set_fill(BLACK, opacity=0)
 
             x = (c - grid_size / 2 + 0.5) * square_size
-            y = (r - grid_size / 2 + 0.5) * square_size + y_shift
+            y = (r - grid_size / 2 + 0.5) * square_size
             sq.move_to([x, y, 0])
 
             grid.add(sq)
-            squares[(r, c)] = sq
-    return grid, squares
+            cells.append((r, c))
+    return grid, cells
 
 
-def seed_from_diagonals(diagonals, grid_size):
-    """
-    Encoding:
-      (start_row, start_col, length) uses direction = +1
-      (start_row, start_col, length, direction) with direction in {+1, -1}
+def make_grid(grid_size, square_size, stroke_width=1.5, y_shift=0.0):
+    """Return (grid VGroup, squares dict[(r,c)->Square]), cloned from a cached template."""
+    template, cells = _grid_template(grid_size, square_size, stroke_width)
+    grid = template.copy()
+    if y_shift:
+        grid.shift(y_shift * UP)
+    return grid, dict(zip(cells, grid.submobjects))
 
-    We always do: (row, col) = (start_row + i*direction, start_col + i)
+
+def time_heatmap(times, height, max_side=1024):
     """
-    filled = set()
-    for info in diagonals:
-        if len(info) == 4:
-            start_r, start_c, length, direction = info
-        else:
-            start_r, start_c, length = info
-            direction = 1
-
-        for i in range(length):
-            r = start_r + i * direction
-            c = start_c + i
-            if 0 <= r < grid_size and 0 <= c < grid_size:
-                filled.add((r, c))
-    return filled
-
-
-def get_neighbors(pos, grid_size):
-    r, c = pos
-    out = []
-    for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        rr, cc = r + dr, c + dc
-        if 0 <= rr < grid_size and 0 <= cc < grid_size:
-            out.append((rr, cc))
-    return out
-
-
-def find_next_to_fill(filled, grid_size):
-    to_fill = []
-    for r in range(grid_size):
-        for c in range(grid_size):
-            if (r, c) in filled:
-                continue
-            count = 0
-            for nb in get_neighbors((r, c), grid_size):
-                if nb in filled:
-                    count += 1
-                if count >= 2:
-                    to_fill.append((r, c))
-                    break
-    return to_fill
+    One ImageMobject coloured by infection generation, revealed up to the
+    returned ValueTracker's value, and a colour-bar legend for it. The cost
+    per frame is bounded by max_side, not by the grid size.
+    """
+    reveal = Reveal(times, max_side=max_side)
+    tracker = ValueTracker(0)
+    image = ImageMobject(reveal.at(0))
+    image.set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+    image.scale_to_fit_height(height)
+    image.add_updater(lambda m: setattr(m, "pixel_array", reveal.at(tracker.get_value())))
+
+    strip, ticks = legend(reveal.last)
+    bar = ImageMobject(strip)
+    bar.set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+    bar.stretch_to_fit_height(height * 0.8).stretch_to_fit_width(0.25)
+    bar.next_to(image, RIGHT, buff=0.4)
+    labels = VGroup(*[
+        Text(str(gen), font_size=16).next_to(bar.get_corner(DR) + frac * bar.height * UP, RIGHT, buff=0.1)
+        for frac, gen in ticks
+    ])
+    caption = Text("gen", font_size=18).next_to(bar, UP, buff=0.15)
+    return image, Group(bar, labels, caption), tracker, reveal.last
+
+
+def perimeter_outline(filled, squares, color=YELLOW, stroke_width=6):
+    """Perimeter of `filled` as one VMobject: a closed sub-path per boundary loop."""
+    corner = squares[(0, 0)].get_corner(DL)
+    side = squares[(0, 0)].width
+    outline = VMobject(color=color, stroke_width=stroke_width)
+    for loop in perimeter_loops(filled):
+        points = [corner + (x * RIGHT + y * UP) * side for x, y in loop]
+        outline.start_new_path(points[0])
+        outline.add_points_as_corners(points[1:] + points[:1])
+    return outline
+
+
+def generation_steps(panels, beat):
+    """One AnimationGroup per generation of `beat`, over (squares, generations) panels."""
+    steps = []
+    for gen in range(beat.first, beat.last + 1):
+        anims = [squares[p].animate.set_fill(BLUE, opacity=0.85)
+                 for squares, gens in panels if gen <= len(gens) for p in gens[gen - 1]]
+        steps.append(AnimationGroup(*anims))
+    return steps[0] if len(steps) == 1 else Succession(*steps)
+
+
+def run_race(scene, all_squares, all_filled, labels, counters, grid_size, fill_interval):
+    """
+    Spread every panel together, a beat at a time; colours each label when
+    its panel is done and returns the generations each panel took (inf if
+    it stalls).
+    """
+    gens = [fill_generations(filled, grid_size) for filled in all_filled]
+    times = []
+    for filled, g in zip(all_filled, gens):
+        full = len(filled) + sum(map(len, g)) == grid_size * grid_size
+        times.append(len(g) if full else float("inf"))
+    longest = max(map(len, gens), default=0)
+    deltas = [sum(len(g[i]) for g in gens if i < len(g)) for i in range(longest)]
+    done = [False] * len(gens)
+
+    def finish(before):
+        for idx, g in enumerate(gens):
+            if not done[idx] and len(g) < before:
+                done[idx] = True
+                labels[idx].set_color(GREEN if times[idx] != float("inf") else RED)
+
+    for beat in schedule(deltas, SPREAD_TARGET, run_time=0.3, wait=max(0.0, fill_interval - 0.3)):
+        finish(beat.first)
+        counter_updates = []
+        for idx, g in enumerate(gens):
+            if len(g) >= beat.first:
+                all_filled[idx].update(p for step in g[beat.first - 1:beat.last] for p in step)
+                gen = min(beat.last, len(g))
+                new_counter = Text(f"Gen: {gen}", font_size=18, color=YELLOW).move_to(counters[idx])
+                counter_updates.append(Transform(counters[idx], new_counter))
+        scene.play(generation_steps(list(zip(all_squares, gens)), beat), *counter_updates,
+                   run_time=beat.run_time)
+        scene.wait(beat.wait)
+    finish(longest + 1)
+    return times
 
 
 # ---------------------------
@@ -125,25 +195,7 @@ class PerimeterInvariance(Scene):
         )
         self.wait(0.6)
 
-        def highlight_perimeter(filled_set, color=YELLOW):
-            perimeter_edges = []
-            for row, col in filled_set:
-                sq = squares[(row, col)]
-                # Top edge
-                if (row + 1, col) not in filled_set:
-                    perimeter_edges.append(Line(sq.get_corner(UL), sq.get_corner(UR), color=color, stroke_width=6))
-                # Bottom edge
-                if (row - 1, col) not in filled_set:
-                    perimeter_edges.append(Line(sq.get_corner(DL), sq.get_corner(DR), color=color, stroke_width=6))
-                # Left edge
-                if (row, col - 1) not in filled_set:
-                    perimeter_edges.append(Line(sq.get_corner(DL), sq.get_corner(UL), color=color, stroke_width=6))
-                # Right edge
-                if (row, col + 1) not in filled_set:
-                    perimeter_edges.append(Line(sq.get_corner(DR), sq.get_corner(UR), color=color, stroke_width=6))
-            return VGroup(*perimeter_edges)
-
-        perimeter = highlight_perimeter(filled)
+        perimeter = perimeter_outline(filled, squares)
         perimeter_text = Text("Perimeter = 8", font_size=28).to_edge(DOWN)
         self.play(Create(perimeter), Write(perimeter_text))
         self.wait(1.2)
@@ -157,7 +209,7 @@ class PerimeterInvariance(Scene):
         new_square = (1, 2)
         filled.add(new_square)
 
-        new_perimeter = highlight_perimeter(filled)
+        new_perimeter = perimeter_outline(filled, squares)
         new_text = Text("Perimeter = 8 (stays the same!)", font_size=28).to_edge(DOWN)
 
         self.play(
@@ -230,21 +282,14 @@ class DiagonalSolution(Scene):
         self.play(*[squares[p].animate.set_fill(RED, opacity=0.85) for p in filled], run_time=0.8)
         self.wait(0.6)
 
+        gens = fill_generations(filled, grid_size)
         gen = 0
-        while len(filled) < grid_size * grid_size:
-            nxt = find_next_to_fill(filled, grid_size)
-            if not nxt:
-                break
-
-            gen += 1
-            anims = []
-            for p in nxt:
-                filled.add(p)
-                anims.append(squares[p].animate.set_fill(BLUE, opacity=0.85))
-
+        for beat in schedule([len(g) for g in gens], SPREAD_TARGET, run_time=0.35, wait=0.22):
+            gen = beat.last
             new_counter = Text(f"Generation: {gen}", font_size=26, color=YELLOW).move_to(gen_counter)
-            self.play(*anims, Transform(gen_counter, new_counter), run_time=0.35)
-            self.wait(0.22)
+            self.play(generation_steps([(squares, gens)], beat), Transform(gen_counter, new_counter),
+                      run_time=beat.run_time)
+            self.wait(beat.wait)
 
         punch = Text(f"Diagonal finishes in {gen} generations", font_size=34, color=GREEN)
         punch.next_to(title, DOWN, buff=0.5)
@@ -277,8 +322,6 @@ class DiagonalRace(Scene):
         all_filled = []
         labels = []
         counters = []
-        finished = []
-        times = []
 
         for config in configs:
             grid, squares = make_grid(grid_size, square_size, stroke_width=1.0, y_shift=0.0)
@@ -295,8 +338,6 @@ class DiagonalRace(Scene):
             all_filled.append(filled)
             labels.append(label)
             counters.append(counter)
-            finished.append(False)
-            times.append(None)
 
         # Centered layout: 2 on top, 3 on bottom
         top_row = VGroup(*panels[:2]).arrange(RIGHT, buff=1.2)
@@ -314,39 +355,7 @@ class DiagonalRace(Scene):
         self.play(*init_anims, run_time=0.8)
         self.wait(0.6)
 
-        generation = 0
-        while not all(finished):
-            generation += 1
-            anims = []
-            counter_updates = []
-
-            for idx in range(len(configs)):
-                if finished[idx]:
-                    continue
-
-                if len(all_filled[idx]) == grid_size * grid_size:
-                    finished[idx] = True
-                    labels[idx].set_color(GREEN)
-                    times[idx] = generation - 1
-                    continue
-
-                nxt = find_next_to_fill(all_filled[idx], grid_size)
-                if not nxt:
-                    finished[idx] = True
-                    labels[idx].set_color(RED)
-                    times[idx] = float("inf")
-                    continue
-
-                for p in nxt:
-                    all_filled[idx].add(p)
-                    anims.append(all_squares[idx][p].animate.set_fill(BLUE, opacity=0.85))
-
-                new_counter = Text(f"Gen: {generation}", font_size=18, color=YELLOW).move_to(counters[idx])
-                counter_updates.append(Transform(counters[idx], new_counter))
-
-            if anims:
-                self.play(*anims, *counter_updates, run_time=0.3)
-                self.wait(max(0.0, fill_interval - 0.3))
+        times = run_race(self, all_squares, all_filled, labels, counters, grid_size, fill_interval)
 
         self.wait(0.5)
         self.play(VGroup(*panels).animate.set_opacity(0.18), run_time=0.5)
@@ -387,14 +396,14 @@ class DiagonalRace9x9(Scene):
             {"name": "7+2",   "diagonals": [(2, 0, 7), (0, 7, 2)]},
             {"name": "8+1",   "diagonals": [(1, 0, 8), (0, 8, 1)]},
         ]
+        # PERCOLATION_RESULTS=results.db races configs from the results store instead.
+        configs = race_configs(os.environ.get("PERCOLATION_RESULTS"), grid_size, count=6) or configs
 
         panels = []
         all_squares = []
         all_filled = []
         labels = []
         counters = []
-        finished = []
-        times = []
 
         for config in configs:
             grid, squares = make_grid(grid_size, square_size, stroke_width=1.0, y_shift=0.0)
@@ -411,8 +420,6 @@ class DiagonalRace9x9(Scene):
             all_filled.append(filled)
             labels.append(label)
             counters.append(counter)
-            finished.append(False)
-            times.append(None)
 
         layout = VGroup(*panels).arrange_in_grid(rows=2, cols=3, buff=(1.2, 0.9))
         layout.next_to(title, DOWN, buff=0.5)
@@ -425,39 +432,7 @@ class DiagonalRace9x9(Scene):
         self.play(*init_anims, run_time=0.8)
         self.wait(0.6)
 
-        generation = 0
-        while not all(finished):
-            generation += 1
-            anims = []
-            counter_updates = []
-
-            for idx in range(len(configs)):
-                if finished[idx]:
-                    continue
-
-                if len(all_filled[idx]) == grid_size * grid_size:
-                    finished[idx] = True
-                    labels[idx].set_color(GREEN)
-                    times[idx] = generation - 1
-                    continue
-
-                nxt = find_next_to_fill(all_filled[idx], grid_size)
-                if not nxt:
-                    finished[idx] = True
-                    labels[idx].set_color(RED)
-                    times[idx] = float("inf")
-                    continue
-
-                for p in nxt:
-                    all_filled[idx].add(p)
-                    anims.append(all_squares[idx][p].animate.set_fill(BLUE, opacity=0.85))
-
-                new_counter = Text(f"Gen: {generation}", font_size=18, color=YELLOW).move_to(counters[idx])
-                counter_updates.append(Transform(counters[idx], new_counter))
-
-            if anims:
-                self.play(*anims, *counter_updates, run_time=0.3)
-                self.wait(max(0.0, fill_interval - 0.3))
+        times = run_race(self, all_squares, all_filled, labels, counters, grid_size, fill_interval)
 
         self.wait(0.5)
 
@@ -560,6 +535,80 @@ class ExtraSeedsSpeedup(Scene):
         self.play(FadeOut(result), FadeOut(layout), FadeOut(title))
 
 
+class SeedSensitivity(Scene):
+    def construct(self):
+        title = Text("Which single cell matters?", font_size=36)
+        title.to_edge(UP)
+        self.play(Write(title))
+
+        n = 9
+        s = 0.5
+        diagonals = [(3, 0, 6), (0, 6, 3)]
+        filled = seed_from_diagonals(diagonals, n)
+
+        seeds = grid_from_cells(filled, (n, n))
+        base, _ = summarize_times(infection_times(seeds))
+        heat = sensitivity(seeds)
+
+        grid, squares = make_grid(n, s, stroke_width=1.0, y_shift=-0.3)
+        self.add(grid)
+        self.play(*[squares[p].animate.set_fill(BLUE, opacity=0.85) for p in filled], run_time=0.8)
+        self.wait(0.4)
+
+        # Faster cells shade from GREEN_E (fastest) to GREEN_A (one generation saved).
+        faster, same, slower, never_fills = [GREEN_E, GREEN_A], GREY_D, ORANGE, RED
+        anims = []
+        for (r, c), t in np.ndenumerate(heat):
+            if t < 0:
+                color = never_fills
+            elif t < base:
+                color = interpolate_color(*faster, t / base)
+            elif t > base:
+                color = slower
+            else:
+                color = same
+            anims.append(squares[(r, c)].animate.set_fill(color, opacity=0.85))
+        self.play(LaggedStart(*anims, lag_ratio=0.01), run_time=2.0)
+
+        entries = [("faster", faster), ("no change", same), ("slower", slower), ("never fills", never_fills)]
+        swatches = []
+        for label, color in entries:
+            swatch = Rectangle(width=0.5, height=0.25).set_stroke(WHITE, width=1.0)
+            swatch.set_fill(color, opacity=0.85).set_sheen_direction(RIGHT)
+            swatches.append(VGroup(swatch, Text(label, font_size=20)).arrange(RIGHT, buff=0.12))
+        key = VGroup(
+            Text(f"toggle one cell (base: {base} gens)", font_size=22), *swatches,
+        ).arrange(RIGHT, buff=0.4)
+        key.scale_to_fit_width(min(key.width, config.frame_width - 0.6)).next_to(grid, DOWN, buff=0.35)
+        self.play(FadeIn(key))
+        self.wait(2.0)
+
+        self.play(FadeOut(key), FadeOut(grid), FadeOut(title))
+
+
+class InfectionTimeHeatmap(Scene):
+    def construct(self):
+        title = Text("When does each cell fall?", font_size=36)
+        title.to_edge(UP)
+        self.play(Write(title))
+
+        n = 2000
+        seeds = np.random.default_rng(7).random((n, n)) < 0.06
+        times = jit.infection_times(seeds, 2)
+        image, key, tracker, last = time_heatmap(times, height=6.2)
+        Group(image, key).move_to(0.3 * DOWN)
+        caption = Text(f"{n}×{n}, random seeds (p = 0.06)", font_size=20)
+        caption.next_to(image, DOWN, buff=0.15)
+
+        self.add(image)
+        self.play(FadeIn(key), FadeIn(caption))
+        self.play(tracker.animate.set_value(last), run_time=8, rate_func=linear)
+        self.wait(1.5)
+
+        image.clear_updaters()
+        self.play(FadeOut(image), FadeOut(key), FadeOut(caption), FadeOut(title))
+
+
 class TimeVsSeedsConcept(Scene):
     def construct(self):
         title = Text("How fast can you finish with k seeds?", font_size=40)
@@ -567,13 +616,14 @@ class TimeVsSeedsConcept(Scene):
         self.play(Write(title))
         self.wait(0.4)
 
+        n = 7
         axes = Axes(
-            x_range=[0, 100, 10],
-            y_range=[0, 40, 5],
+            x_range=[0, n * n, n],
+            y_range=[0, n, 1],
             x_length=10,
             y_length=5.2,
             tips=False
-        )
+        ).add_coordinates(font_size=20)
         axes_labels = axes.get_axis_labels(
             x_label=Text("k (initial infected)", font_size=24),
             y_label=Text("T(k) (generations)", font_size=24)
@@ -582,33 +632,39 @@ class TimeVsSeedsConcept(Scene):
         self.play(Create(group))
         self.wait(0.3)
 
-        # Landmark points (conceptual)
-        n = 30
-        p1 = axes.c2p(n, n - 1)
-        p2 = axes.c2p(2 * n, int(n / 2))
-        p3 = axes.c2p(n * n, 0)
+        # Exact values for n = 7: the fastest k-seed set, for every k.
+        breaks = sorted(TMIN_7)
+        times = {k: TMIN_7[max(b for b in breaks if b <= k)] for k in range(n, n * n + 1)}
+        dots = VGroup(*[Dot(axes.c2p(k, t), radius=0.05, color=BLUE) for k, t in times.items()])
+        caption = Text(f"exact, {n}×{n} grid", font_size=22, color=BLUE)
+        caption.next_to(axes.c2p(n * n, n), DOWN + LEFT, buff=0.1)
+        self.play(LaggedStart(*[FadeIn(d) for d in dots], lag_ratio=0.05), FadeIn(caption))
 
-        d1, d2, d3 = Dot(p1), Dot(p2), Dot(p3)
+        # Landmarks
+        d1, d2, d3 = (Dot(axes.c2p(k, times[k]), color=YELLOW) for k in (n, 2 * n, n * n))
         self.play(FadeIn(d1), FadeIn(d2), FadeIn(d3))
 
-        l1 = Text("k = n", font_size=20).next_to(d1, UP, buff=0.1)
-        l2 = Text("k = 2n", font_size=20).next_to(d2, UP, buff=0.1)
+        l1 = Text(f"k = n: T = {times[n]}", font_size=20).next_to(d1, UP, buff=0.1)
+        l2 = Text(f"k = 2n: T = {times[2 * n]}", font_size=20).next_to(d2, UP, buff=0.1)
         l3 = Text("k = n²", font_size=20).next_to(d3, UP, buff=0.1)
         self.play(FadeIn(l1), FadeIn(l2), FadeIn(l3))
         self.wait(0.4)
 
+        # Read off the plotted table, so the text cannot drift from the dots.
+        costs = ", ".join(str(b - a) for a, b in zip(breaks, breaks[1:]))
+        one_step = min(k for k, t in times.items() if t == 1)
         msg = VGroup(
-            Text("Big picture:", font_size=28, color=YELLOW),
-            Text("T(n) = n − 1  (diagonal is very slow)", font_size=30),
-            Text("T(k) drops sharply just above k = n", font_size=30),
-            Text("Then roughly:  T(k) ~ n / sqrt(k)", font_size=32, color=GREEN),
+            Text("Exact, 7×7:", font_size=28, color=YELLOW),
+            Text(f"T(n) = n − 1 = {times[n]}: the diagonal is as fast as n seeds get", font_size=28),
+            Text(f"each generation saved costs more seeds: {costs}", font_size=28),
+            Text(f"one generation needs k = {one_step}; zero needs all {n * n}", font_size=28, color=GREEN),
         ).arrange(DOWN, buff=0.22, aligned_edge=LEFT).to_edge(DOWN)
 
         self.play(Write(msg), run_time=2.2)
         self.wait(2.0)
 
         self.play(
-            FadeOut(msg), FadeOut(group),
+            FadeOut(msg), FadeOut(group), FadeOut(dots), FadeOut(caption),
             FadeOut(d1), FadeOut(d2), FadeOut(d3),
             FadeOut(l1), FadeOut(l2), FadeOut(l3),
             FadeOut(title)
@@ -619,28 +675,23 @@ class TimeVsSeedsConcept(Scene):
 # Full video
 # ---------------------------
 
-class FullVideo(Scene):
-    def construct(self):
-        InfectionProblem.construct(self)
-        self.clear()
-
-        PerimeterInvariance.construct(self)
-        self.clear()
-
-        LowerBoundN.construct(self)
-        self.clear()
-
-        DiagonalSolution.construct(self)
-        self.clear()
-
-        DiagonalRace.construct(self)
-        self.clear()
+class FullVideo(MemoryProfiledScene, PipelinedScene):
+    # Chained on this one Scene, in order; PERCOLATION_MEMORY=report.json
+    # records memory at every boundary (see memory_profile).
+    scenes = [
+        InfectionProblem,
+        PerimeterInvariance,
+        LowerBoundN,
+        DiagonalSolution,
+        DiagonalRace,
+        DiagonalRace9x9,
+        ExtraSeedsSpeedup,
+        TimeVsSeedsConcept,
+    ]
 
-        DiagonalRace9x9.construct(self)
-        self.clear()
-
-        ExtraSeedsSpeedup.construct(self)
-        self.clear()
-
-        TimeVsSeedsConcept.construct(self)
-        self.clear()
+    def construct(self):
+        for scene in self.scenes:
+            scene.construct(self)
+            self.clear()
+            _grid_template.cache_clear()
+            self.scene_boundary(scene.__name__)
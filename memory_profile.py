@@ -0,0 +1,189 @@
+"""
+Memory accounting for scenes chained on one Scene (FullVideo).
+
+    PERCOLATION_MEMORY=memory.json manim -ql infection_video.py FullVideo
+
+A scene that mixes in MemoryProfiledScene (listed before its Scene base)
+records, when PERCOLATION_MEMORY is set, a snapshot after every self.play
+(self.wait included) and at every scene_boundary(name):
+
+- the mobjects on screen (self.mobjects) and their submobject total;
+- the live Mobject instances anywhere in the process, by type, and the
+  updaters they carry;
+- tracemalloc's current traced memory and its peak since the previous
+  snapshot, and the process's peak RSS.
+
+A boundary runs the garbage collector first, so its counts are what
+survived self.clear(), and compares them with the previous boundary. When
+live mobjects or traced memory grew by more than GROWTH_MOBJECTS /
+GROWTH_BYTES across a scene, the boundary is flagged with a warning naming
+the mobject types and the allocation sites (tracemalloc snapshot diff) that
+grew: a squares dict, Transform target or updater closure that outlives its
+scene shows up there. The JSON report (rewritten at every boundary, so an
+aborted render still leaves one) holds every snapshot and boundary.
+
+Tracing slows rendering down and counting live mobjects walks every object
+the collector tracks, so nothing is recorded unless the variable is set.
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from collections import Counter
+
+from manim import Mobject, logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENV = "PERCOLATION_MEMORY"
+GROWTH_BYTES = 8 << 20
+GROWTH_MOBJECTS = 100
+TOP = 8
+
+
+def live_mobjects():
+    """(Counter of live Mobject instances by type name, total updaters they hold)."""
+    types = Counter()
+    updaters = 0
+    for obj in gc.get_objects():
+        if isinstance(obj, Mobject):
+            types[type(obj).__name__] += 1
+            updaters += len(obj.updaters)
+    return types, updaters
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _megabytes(size):
+    return f"{size / 2**20:+.1f} MB"
+
+
+class MemoryProfile:
+    """Snapshots of one render, written to `path` as JSON."""
+
+    def __init__(self, path, top=TOP):
+        self.path = path
+        self.top = top
+        self.snapshots = []
+        self.boundaries = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        gc.collect()
+        types, _ = live_mobjects()
+        # Traced memory is read with one diff snapshot alive, here and at every boundary.
+        self._previous = {"types": types, "snapshot": self._snapshot(),
+                          "traced": tracemalloc.get_traced_memory()[0]}
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def record(self, scene, label, live=None):
+        """Append a snapshot of `scene`; `live` reuses a live_mobjects() result."""
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        types, updaters = live if live is not None else live_mobjects()
+        snapshot = {
+            "label": label,
+            "scene": None,  # filled in by the next boundary
+            "play": scene.renderer.num_plays,
+            "mobjects": len(scene.mobjects),
+            "submobjects": sum(len(m.get_family()) for m in scene.mobjects),
+            "live_mobjects": sum(types.values()),
+            "updaters": updaters,
+            "traced": current,
+            "traced_peak": peak,
+            "peak_rss": peak_rss(),
+        }
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def boundary(self, scene, name):
+        """Record the end of chained scene `name` and compare it with the previous boundary."""
+        gc.collect()
+        live = live_mobjects()
+        snapshot = self.record(scene, "boundary", live)
+        own = [s for s in self.snapshots if s["scene"] is None]
+        for s in own:
+            s["scene"] = name
+
+        types = live[0]
+        previous = self._previous
+        grown = Counter({t: c - previous["types"][t] for t, c in types.items() if c > previous["types"][t]})
+        diff = self._snapshot()
+        sites = [{"site": str(stat.traceback[0]), "size": stat.size_diff, "count": stat.count_diff}
+                 for stat in diff.compare_to(previous["snapshot"], "lineno")[:self.top] if stat.size_diff > 0]
+        entry = {
+            "scene": name,
+            "plays": len(own) - 1,
+            "live_mobjects": snapshot["live_mobjects"],
+            "mobject_growth": snapshot["live_mobjects"] - sum(previous["types"].values()),
+            "traced": snapshot["traced"],
+            "traced_growth": snapshot["traced"] - previous["traced"],
+            "traced_peak": max(s["traced_peak"] for s in own),
+            "updaters": snapshot["updaters"],
+            "grown_types": dict(grown.most_common(self.top)),
+            "sites": sites,
+        }
+        entry["flagged"] = entry["mobject_growth"] > GROWTH_MOBJECTS or entry["traced_growth"] > GROWTH_BYTES
+        self.boundaries.append(entry)
+        self._previous = {"types": types, "snapshot": diff, "traced": snapshot["traced"]}
+
+        summary = (f"{name}: {entry['live_mobjects']} live mobjects ({entry['mobject_growth']:+d}), "
+                   f"traced {_megabytes(entry['traced_growth'])}, peak {entry['traced_peak'] / 2**20:.1f} MB")
+        if entry["flagged"]:
+            kept = ", ".join(f"{t} +{c}" for t, c in grown.most_common(3)) or "no mobjects"
+            where = "; ".join(f"{s['site']} {_megabytes(s['size'])}" for s in sites[:3])
+            logger.warning(f"Memory kept after {summary}. Grown: {kept}. Top sites: {where}")
+        else:
+            logger.info(summary)
+        self.save()
+        return entry
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump({"snapshots": self.snapshots, "boundaries": self.boundaries}, f, indent=1)
+
+    def finish(self, scene):
+        if any(s["scene"] is None for s in self.snapshots):
+            self.boundary(scene, type(scene).__name__)
+        else:
+            self.save()
+        logger.info(f"Memory report written to {self.path}")
+
+
+class MemoryProfiledScene:
+    """Scene mixin recording a MemoryProfile when PERCOLATION_MEMORY names a report file."""
+
+    memory = None
+
+    def setup(self):
+        super().setup()
+        path = os.environ.get(ENV)
+        if path:
+            self.memory = MemoryProfile(path)
+
+    def play(self, *args, **kwargs):
+        super().play(*args, **kwargs)
+        if self.memory is not None:
+            self.memory.record(self, "play")
+
+    def scene_boundary(self, name):
+        """Mark the end of one chained scene; call it after self.clear()."""
+        if self.memory is not None:
+            self.memory.boundary(self, name)
+
+    def tear_down(self):
+        if self.memory is not None:
+            self.memory.finish(self)
+        super().tear_down()
@@ -0,0 +1,17 @@
+"""Bootstrap percolation simulation core (NumPy only, no Manim)."""
+
+from .engine import (
+    closure,
+    grid_from_cells,
+    infection_times,
+    iter_deltas,
+    neighbor_counts,
+    never,
+    permutation_stack,
+    step,
+    summarize_times,
+    time_dtype,
+)
+from .storage import TimesStore
+from .termination import Outcome, batch_generations, closure_rectangles, simulate
+from .rules import Rule
@@ -0,0 +1,74 @@
+"""
+Interchangeable simulation backends.
+
+Every backend takes a boolean seed grid (2D [row, col] or 3D [z, row, col])
+and a threshold, and returns the same infection-time array as
+engine.infection_times.
+"""
+import numpy as np
+
+from . import bitboard, core, jit
+from .engine import infection_times, iter_deltas, never, time_dtype
+
+
+def reference_times(seeds, threshold=2):
+    """The scenes' set-of-tuples loops (square grids and cubes only)."""
+    seeds = np.asarray(seeds, dtype=bool)
+    n = seeds.shape[0]
+    if any(side != n for side in seeds.shape):
+        raise ValueError("reference backend needs a square grid or cube")
+
+    times = np.full(seeds.shape, never(time_dtype(seeds.size)), dtype=time_dtype(seeds.size))
+    times[seeds] = 0
+    if seeds.ndim == 2:
+        filled = set(map(tuple, np.argwhere(seeds).tolist()))
+        advance = lambda: core.find_next_to_fill(filled, n, threshold)
+        index = lambda cell: cell
+    else:
+        # next_infections works on (row, col, z) cells.
+        filled = {(r, c, z) for z, r, c in np.argwhere(seeds).tolist()}
+        advance = lambda: core.next_infections(filled, n, threshold)
+        index = lambda cell: (cell[2], cell[0], cell[1])
+
+    gen = 0
+    while True:
+        nxt = advance()
+        if not nxt:
+            break
+        gen += 1
+        for cell in nxt:
+            filled.add(cell)
+            times[index(cell)] = gen
+    return times
+
+
+def frontier_times(seeds, threshold=2):
+    """Infection times from the iter_deltas stream."""
+    seeds = np.asarray(seeds, dtype=bool)
+    times = np.full(seeds.size, never(time_dtype(seeds.size)), dtype=time_dtype(seeds.size))
+    times[seeds.reshape(-1)] = 0
+    for gen, delta in enumerate(iter_deltas(seeds, threshold, flat=True), 1):
+        times[delta] = gen
+    return times.reshape(seeds.shape)
+
+
+BACKENDS = {
+    "reference": reference_times,
+    "vectorized": infection_times,
+    "frontier": frontier_times,
+    "bitboard": bitboard.infection_times,
+}
+if jit.HAVE_NUMBA:
+    BACKENDS["numba"] = jit.infection_times
+
+# Fastest available backend (see percolation.bench).
+DEFAULT_BACKEND = "numba" if jit.HAVE_NUMBA else "vectorized"
+
+
+def get_backend(name=None):
+    """Backend function by name; None picks DEFAULT_BACKEND."""
+    name = DEFAULT_BACKEND if name is None else name
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown backend {name!r}; choose from {sorted(BACKENDS)}") from None
@@ -0,0 +1,183 @@
+"""
+Benchmark every backend across grid sizes and seed families.
+
+    python -m percolation.bench --out bench.json
+    python -m percolation.bench --sizes 8 64 512 --backends vectorized bitboard
+    python -m percolation.bench --compare old.json new.json
+
+For every (family, size) all selected backends run on the same seeds and
+their infection-time arrays must agree; any disagreement is reported and
+makes the exit status non-zero. A backend stops climbing sizes for a family
+once its predicted time (last time × (size ratio)^3, the diagonal's worst
+case) exceeds --budget seconds.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .backends import BACKENDS
+from .engine import grid_from_cells, permutation_stack, summarize_times
+from .seeds import diagonal_cells, to_diagonals
+
+SIZES_2D = [8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+SIZES_3D = [4, 8, 16, 32, 64]
+RANDOM_P = 0.1
+
+
+def _diagonal_grid(diagonals, n):
+    grid = np.zeros((n, n), dtype=bool)
+    grid[diagonal_cells(diagonals, n)] = True
+    return grid
+
+
+def family_2d(name, n):
+    """Seed grid for one of the standard 2D families."""
+    if name == "diagonal":
+        return _diagonal_grid([(0, 0, n)], n)
+    if name == "race-halves":
+        # "Two 4s" on 8×8.
+        return _diagonal_grid(to_diagonals((n // 2, n - n // 2), (1, 0), (1, 1)), n)
+    if name == "race-2":
+        # "6 + 2" on 8×8.
+        return _diagonal_grid(to_diagonals((n - 2, 2), (1, 0), (1, 1)), n)
+    if name == "diagonal+2":
+        # ExtraSeedsSpeedup: the diagonal plus a 2×2 block in the middle.
+        i = n // 2 - 1
+        return grid_from_cells([(k, k) for k in range(n)] + [(i, i + 1), (i + 1, i)], (n, n))
+    if name == "random":
+        return np.random.default_rng(n).random((n, n)) < RANDOM_P
+    raise ValueError(f"unknown family: {name}")
+
+
+def family_3d(name, n):
+    """Seed cube ([z, row, col]) for one of the standard 3D families."""
+    if name == "cube-shift":
+        # The cyclic shift in cube_slices_trial.PERMS.
+        return permutation_stack([[(r + z) % n for r in range(n)] for z in range(n)])
+    if name == "cube-random":
+        return np.random.default_rng(n).random((n, n, n)) < RANDOM_P
+    raise ValueError(f"unknown family: {name}")
+
+
+FAMILIES_2D = ["diagonal", "race-halves", "race-2", "diagonal+2", "random"]
+FAMILIES_3D = ["cube-shift", "cube-random"]
+THRESHOLD_3D = 3
+
+
+def time_backend(fn, seeds, threshold, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        times = fn(seeds, threshold)
+        best = min(best, time.perf_counter() - start)
+    return best, times
+
+
+def run(backends, families, sizes, make_seeds, threshold, repeat, budget, log):
+    results, mismatches = [], []
+    if families:
+        # Load compiled/cached kernels before anything is timed.
+        warmup = make_seeds(families[0], sizes[0])
+        for name in backends:
+            BACKENDS[name](warmup, threshold)
+    for family in families:
+        last = {}
+        for n in sizes:
+            seeds = make_seeds(family, n)
+            expected = None
+            for name in backends:
+                if name in last:
+                    prev_n, prev_t = last[name]
+                    if prev_t * (n / prev_n) ** 3 > budget:
+                        continue
+                seconds, times = time_backend(BACKENDS[name], seeds, threshold, repeat)
+                last[name] = (n, seconds)
+
+                if expected is None:
+                    expected, agrees = times, True
+                else:
+                    agrees = bool(np.array_equal(times, expected))
+                    if not agrees:
+                        mismatches.append((name, family, n))
+                generations, percolates = summarize_times(times)
+                results.append({
+                    "backend": name, "family": family, "n": n, "dim": seeds.ndim,
+                    "threshold": threshold, "seconds": seconds,
+                    "generations": generations, "percolates": percolates, "agrees": agrees,
+                })
+                log(f"{family:12s} n={n:<5d} {name:11s} {seconds * 1e3:10.2f} ms  gens={generations}"
+                    + ("" if agrees else "  MISMATCH"))
+    return results, mismatches
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit or None,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+    }
+
+
+def compare(base_path, new_path):
+    """Print new/base time ratios for every case present in both files."""
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    key = lambda r: (r["family"], r["n"], r["backend"])
+    old = {key(r): r["seconds"] for r in base["results"]}
+    print(f"base {base['meta'].get('commit')}  vs  new {new['meta'].get('commit')}")
+    for r in sorted(new["results"], key=key):
+        if key(r) in old:
+            ratio = r["seconds"] / old[key(r)]
+            print(f"{r['family']:12s} n={r['n']:<5d} {r['backend']:11s} {old[key(r)] * 1e3:10.2f} -> "
+                  f"{r['seconds'] * 1e3:10.2f} ms  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark percolation backends.")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES_2D)
+    parser.add_argument("--sizes-3d", nargs="+", type=int, default=SIZES_3D)
+    parser.add_argument("--families", nargs="+", default=FAMILIES_2D + FAMILIES_3D,
+                        choices=FAMILIES_2D + FAMILIES_3D)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=float, default=10.0, help="seconds per run before a backend stops growing")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    log = lambda msg: print(msg, flush=True)
+    fam2 = [f for f in args.families if f in FAMILIES_2D]
+    fam3 = [f for f in args.families if f in FAMILIES_3D]
+    res2, bad2 = run(args.backends, fam2, args.sizes, family_2d, 2, args.repeat, args.budget, log)
+    res3, bad3 = run(args.backends, fam3, args.sizes_3d, family_3d, THRESHOLD_3D, args.repeat, args.budget, log)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"meta": metadata(), "results": res2 + res3}, f, indent=1)
+
+    mismatches = bad2 + bad3
+    for name, family, n in mismatches:
+        print(f"MISMATCH: {name} disagrees on {family} n={n}", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Bit-parallel backend: the whole grid is one Python integer.
+
+Every axis except the first gets guard slots (one by default, more for
+wider stencils), so shifting by an offset's flat stride moves a cell onto
+its neighbour, and bits that cross an edge land on a guard slot (or off the
+ends) and are cleared by the `valid` mask. A generation is a handful of
+big-integer shifts, ANDs and ORs: the neighbour counts are kept bit-sliced
+as "at least j infected neighbours" boards.
+"""
+import numpy as np
+
+from .engine import never, time_dtype
+
+
+class Layout:
+    """Bit positions of a grid shape: padded strides, the valid-cell mask and conversions."""
+
+    def __init__(self, shape, guard=1):
+        self.shape = tuple(shape)
+        self.padded = (self.shape[0],) + tuple(s + guard for s in self.shape[1:])
+        self.strides = tuple(int(np.prod(self.padded[i + 1:])) for i in range(len(self.shape)))
+        self.nbits = int(np.prod(self.padded))
+        self.nbytes = (self.nbits + 7) // 8
+
+        # Flat bit position of every real cell, in C order of `shape`.
+        pos = np.zeros(self.shape, dtype=np.int64)
+        for axis, stride in enumerate(self.strides):
+            ix = np.arange(self.shape[axis]).reshape([-1 if a == axis else 1 for a in range(len(self.shape))])
+            pos = pos + ix * stride
+        self.positions = pos.reshape(-1)
+        self.valid = self.pack(np.ones(self.shape, dtype=bool))
+
+    def pack(self, grid):
+        bits = np.zeros(self.nbytes * 8, dtype=np.uint8)
+        bits[self.positions] = np.asarray(grid, dtype=bool).reshape(-1)
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+    def unpack_flat(self, board):
+        """Flat (C-order) indices of the cells set in `board`."""
+        raw = np.frombuffer(board.to_bytes(self.nbytes, "little"), dtype=np.uint8)
+        bits = np.unpackbits(raw, bitorder="little")
+        return np.flatnonzero(bits[self.positions])
+
+    def unpack(self, board):
+        grid = np.zeros(int(np.prod(self.shape)), dtype=bool)
+        grid[self.unpack_flat(board)] = True
+        return grid.reshape(self.shape)
+
+
+def at_least(boards, threshold):
+    """Board of cells set in at least `threshold` of `boards` (bit-sliced counters)."""
+    if threshold <= 0:
+        return -1
+    levels = [0] * (threshold + 1)
+    levels[0] = -1
+    for x in boards:
+        for j in range(threshold, 0, -1):
+            levels[j] |= levels[j - 1] & x
+    return levels[threshold]
+
+
+def shift(board, offset):
+    """Board whose bit x is bit x + offset of `board` (a flat bit offset)."""
+    return board >> offset if offset >= 0 else board << -offset
+
+
+def step(board, layout, threshold=2):
+    """Board of cells infected in the next generation."""
+    shifted = []
+    for stride in layout.strides:
+        shifted.append((board << stride) & layout.valid)
+        shifted.append(board >> stride)
+    return at_least(shifted, threshold) & layout.valid & ~board
+
+
+def infection_times(seeds, threshold=2):
+    """Same result as engine.infection_times, computed on bitboards."""
+    seeds = np.asarray(seeds, dtype=bool)
+    layout = Layout(seeds.shape)
+    times = np.full(seeds.size, never(time_dtype(seeds.size)), dtype=time_dtype(seeds.size))
+    times[seeds.reshape(-1)] = 0
+
+    board = layout.pack(seeds)
+    gen = 0
+    while True:
+        new = step(board, layout, threshold)
+        if not new:
+            break
+        gen += 1
+        times[layout.unpack_flat(new)] = gen
+        board |= new
+    return times.reshape(seeds.shape)
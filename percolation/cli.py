@@ -0,0 +1,211 @@
+"""
+Headless batch simulation.
+
+    python -m percolation --n 8 "6+2=diag:[(2,0,6),(0,6,2)]" "full=diag:[(0,0,8)]"
+    python -m percolation "perms:[[0,1,2],[1,2,0],[2,0,1]]" --threshold 3
+    python -m percolation --n 10 file:seeds.txt --format json --out runs.json
+    python -m percolation --n 9 --specs races.txt --workers 8 --format csv
+
+A spec is `[NAME=]KIND:VALUE`:
+
+- diag:   seed_from_diagonals tuples, e.g. [(2,0,6),(0,6,2)] (needs --n)
+- perms:  a permutation stack as in cube_slices_trial.PERMS (3D cube)
+- file:   a text file with one cell per line, "row col" (2D, needs --n or
+          uses the bounding size) or "row col z" (3D cube)
+
+Each run reports generations, whether it percolates, final coverage and the
+number of cells infected per generation (deltas[0] is the seed count).
+"""
+import argparse
+import ast
+import csv
+import io
+import json
+import multiprocessing
+import sys
+
+import numpy as np
+
+from .backends import BACKENDS, DEFAULT_BACKEND, get_backend
+from .core import check_perm
+from .engine import grid_from_cells, never, permutation_stack
+from .seeds import diagonal_cells
+
+
+# ---------------------------
+# Specs
+# ---------------------------
+
+def _read_cells(path):
+    cells = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].replace(",", " ").split()
+            if line:
+                cells.append(tuple(int(v) for v in line))
+    return cells
+
+
+def _check_cells(cells, size, path):
+    for cell in cells:
+        if not all(0 <= v < size for v in cell):
+            raise ValueError(f"{path}: cell {cell} has a coordinate outside 0..{size - 1}")
+
+
+def parse_spec(spec, n=None):
+    """(name, seed grid, default threshold) for one spec string."""
+    name, sep, body = spec.partition("=")
+    if not sep or ":" in name:
+        name, body = spec, spec
+    kind, sep, value = body.partition(":")
+    if not sep:
+        raise ValueError(f"spec needs KIND:VALUE: {spec!r}")
+
+    if kind == "diag":
+        if n is None:
+            raise ValueError("diag specs need --n")
+        grid = np.zeros((n, n), dtype=bool)
+        grid[diagonal_cells(ast.literal_eval(value), n)] = True
+        return name, grid, 2
+    if kind == "perms":
+        perms = ast.literal_eval(value)
+        for z, p in enumerate(perms):
+            if not check_perm(p, len(perms)):
+                raise ValueError(f"perms: slice {z} is not a permutation of 0..{len(perms) - 1}: {p}")
+        return name, permutation_stack(perms), 3
+    if kind == "file":
+        cells = _read_cells(value)
+        dims = {len(c) for c in cells}
+        if dims == {2}:
+            size = n or max(max(c) for c in cells) + 1
+            _check_cells(cells, size, value)
+            return name, grid_from_cells(cells, (size, size)), 2
+        if dims == {3}:
+            size = n or max(max(c) for c in cells) + 1
+            _check_cells(cells, size, value)
+            # Files use cube_slices_trial's (row, col, z); the engine wants [z, row, col].
+            return name, grid_from_cells([(z, r, c) for r, c, z in cells], (size,) * 3), 3
+        raise ValueError(f"{value}: expected 2 or 3 integers per line")
+    raise ValueError(f"unknown spec kind {kind!r} in {spec!r}")
+
+
+def resolve_threshold(default, override, ndim):
+    """--threshold `override` if given, else the spec's `default`; ValueError if out of range."""
+    if override is None:
+        return default
+    # A cell has 2 neighbours per axis; above that nothing new is ever infected.
+    if not 1 <= override <= 2 * ndim:
+        raise ValueError(f"--threshold must be between 1 and {2 * ndim}, got {override}")
+    return override
+
+
+# ---------------------------
+# Running
+# ---------------------------
+
+def run_one(job):
+    name, seeds, threshold, backend = job
+    times = get_backend(backend)(seeds, threshold)
+    reached = times != never(times.dtype)
+    deltas = np.bincount(times[reached].ravel()) if reached.any() else np.zeros(0, np.int64)
+    return {
+        "name": name,
+        "shape": list(seeds.shape),
+        "threshold": threshold,
+        "seeds": int(seeds.sum()),
+        "generations": max(len(deltas) - 1, 0),
+        "percolates": bool(reached.all()),
+        "coverage": float(reached.mean()),
+        "deltas": deltas.tolist(),
+    }, times
+
+
+def run_all(jobs, workers=1):
+    if workers == 1 or len(jobs) == 1:
+        return [run_one(job) for job in jobs]
+    with multiprocessing.Pool(min(workers, len(jobs))) as pool:
+        return pool.map(run_one, jobs)
+
+
+# ---------------------------
+# Output
+# ---------------------------
+
+def write_text(records, f):
+    for r in records:
+        shape = "×".join(map(str, r["shape"]))
+        status = "percolates" if r["percolates"] else "stalls"
+        f.write(f"{r['name']}: {shape}, r={r['threshold']}, {r['seeds']} seeds, {status} after "
+                f"{r['generations']} generations, coverage {r['coverage']:.3f}\n")
+        f.write(f"  deltas: {' '.join(map(str, r['deltas']))}\n")
+
+
+def write_csv(records, f):
+    fields = ["name", "shape", "threshold", "seeds", "generations", "percolates", "coverage", "deltas"]
+    writer = csv.DictWriter(f, fieldnames=fields)
+    writer.writeheader()
+    for r in records:
+        writer.writerow({**r, "shape": "x".join(map(str, r["shape"])), "deltas": " ".join(map(str, r["deltas"]))})
+
+
+def write_npz(records, all_times, path):
+    arrays = {"names": np.array([r["name"] for r in records]),
+              "summary": np.array(json.dumps(records))}
+    for i, (r, times) in enumerate(zip(records, all_times)):
+        arrays[f"times_{i}"] = times
+        arrays[f"deltas_{i}"] = np.array(r["deltas"], dtype=np.int64)
+    np.savez_compressed(path, **arrays)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seed configurations without rendering.")
+    parser.add_argument("specs", nargs="*", help="[NAME=]KIND:VALUE, KIND in diag, perms, file")
+    parser.add_argument("--specs", dest="specs_file", help="file with one spec per line")
+    parser.add_argument("--n", type=int, help="grid size for diag specs (and file specs)")
+    parser.add_argument("--threshold", type=int, help="override the default (2 for grids, 3 for cubes)")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=list(BACKENDS))
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--format", choices=["text", "json", "csv", "npz"], default="text")
+    parser.add_argument("--out", help="output file (required for npz; default stdout)")
+    args = parser.parse_args(argv)
+
+    specs = list(args.specs)
+    if args.specs_file:
+        with open(args.specs_file) as f:
+            specs += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if not specs:
+        parser.error("no specs given")
+    if args.format == "npz" and not args.out:
+        parser.error("--format npz needs --out")
+
+    jobs = []
+    for spec in specs:
+        try:
+            name, seeds, threshold = parse_spec(spec, args.n)
+            threshold = resolve_threshold(threshold, args.threshold, seeds.ndim)
+        except (ValueError, SyntaxError, OSError) as e:
+            parser.error(str(e))
+        jobs.append((name, seeds, threshold, args.backend))
+
+    results = run_all(jobs, args.workers)
+    records = [r for r, _ in results]
+
+    if args.format == "npz":
+        write_npz(records, [t for _, t in results], args.out)
+        return 0
+
+    buf = io.StringIO()
+    if args.format == "json":
+        json.dump(records, buf, indent=1)
+        buf.write("\n")
+    elif args.format == "csv":
+        write_csv(records, buf)
+    else:
+        write_text(records, buf)
+
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            f.write(buf.getvalue())
+    else:
+        sys.stdout.write(buf.getvalue())
+    return 0
@@ -0,0 +1,88 @@
+"""
+Percolation helpers used by the scenes, importable without Manim.
+
+These are the straightforward set-of-tuples loops from infection_video and
+cube_slices_trial, with the grid size and threshold passed in instead of
+read from globals. They are also the reference implementation every faster
+backend is checked against.
+"""
+
+
+def seed_from_diagonals(diagonals, grid_size):
+    """
+    Encoding:
+      (start_row, start_col, length) uses direction = +1
+      (start_row, start_col, length, direction) with direction in {+1, -1}
+
+    We always do: (row, col) = (start_row + i*direction, start_col + i)
+    """
+    filled = set()
+    for info in diagonals:
+        if len(info) == 4:
+            start_r, start_c, length, direction = info
+        else:
+            start_r, start_c, length = info
+            direction = 1
+
+        for i in range(length):
+            r = start_r + i * direction
+            c = start_c + i
+            if 0 <= r < grid_size and 0 <= c < grid_size:
+                filled.add((r, c))
+    return filled
+
+
+def get_neighbors(pos, grid_size):
+    r, c = pos
+    out = []
+    for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+        rr, cc = r + dr, c + dc
+        if 0 <= rr < grid_size and 0 <= cc < grid_size:
+            out.append((rr, cc))
+    return out
+
+
+def find_next_to_fill(filled, grid_size, threshold=2):
+    to_fill = []
+    for r in range(grid_size):
+        for c in range(grid_size):
+            if (r, c) in filled:
+                continue
+            count = 0
+            for nb in get_neighbors((r, c), grid_size):
+                if nb in filled:
+                    count += 1
+                if count >= threshold:
+                    to_fill.append((r, c))
+                    break
+    return to_fill
+
+
+def check_perm(p, n):
+    return sorted(p) == list(range(n))
+
+
+def neighbors_3d(cell, n):
+    r, c, z = cell
+    for dr, dc, dz in [(-1,0,0),(1,0,0),(0,-1,0),(0,1,0),(0,0,-1),(0,0,1)]:
+        rr, cc, zz = r+dr, c+dc, z+dz
+        if 0 <= rr < n and 0 <= cc < n and 0 <= zz < n:
+            yield (rr, cc, zz)
+
+
+def next_infections(infected, n, threshold):
+    to_fill = set()
+    for r in range(n):
+        for c in range(n):
+            for z in range(n):
+                cell = (r, c, z)
+                if cell in infected:
+                    continue
+                cnt = 0
+                for nb in neighbors_3d(cell, n):
+                    if nb in infected:
+                        cnt += 1
+                        if cnt >= threshold:
+                            to_fill.add(cell)
+                            break
+    return to_fill
@@ -0,0 +1,157 @@
+"""
+Critical density: for each n, the seed density p at which a random
+(Bernoulli(p)) seed set percolates with probability 1/2.
+
+    python -m percolation.critical --n 64 256 1024 --workers 8
+    python -m percolation.critical --n 10000 --batch 32 --max-samples 256 --out pc.json
+
+p is bisected. At each probe, grids are sampled in batches until the Wilson
+interval for the percolation probability excludes 1/2 (or --max-samples is
+reached); the probe then becomes the new lower or upper end of the bracket.
+A probe whose interval still straddles 1/2 at the budget ends the search
+for that n. The reported interval is the final bracket: the highest p shown
+to percolate with probability < 1/2 and the lowest shown to be > 1/2.
+
+Batches are split into fixed-size tasks and task t of batch b at probe k
+for size n draws from SeedSequence(seed, spawn_key=(n, k, b, t)), so results
+do not depend on the number of workers. Only the outcome is computed
+(jit.closure), and grids are drawn in row blocks. A worker still holds the
+bool grid, jit.closure's padded uint8 state and its int32 stack of n²
+entries (6 bytes a cell), plus the boolean result while it is extracted:
+about 600-700 MB at n = 10^4, briefly up to 800 MB. Size --workers by that.
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from . import jit
+
+Probe = namedtuple("Probe", ["p", "successes", "trials", "low", "high"])
+
+BLOCK = 1 << 20
+
+
+def sample_grid(rng, shape, p):
+    """Bernoulli(p) grid, drawn in blocks of about BLOCK cells to bound memory."""
+    grid = np.empty(shape, dtype=bool)
+    rows = max(1, BLOCK // max(1, int(np.prod(shape[1:]))))
+    for i in range(0, shape[0], rows):
+        block = grid[i:i + rows]
+        block[...] = rng.random(block.shape, dtype=np.float32) < p
+    return grid
+
+
+def wilson(successes, trials, z=2.576):
+    """Wilson score interval for a binomial proportion."""
+    if trials == 0:
+        return 0.0, 1.0
+    phat = successes / trials
+    denom = 1 + z * z / trials
+    centre = (phat + z * z / (2 * trials)) / denom
+    half = z * math.sqrt(phat * (1 - phat) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _task(args):
+    n, dim, p, threshold, seed, key, count = args
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=key))
+    hits = 0
+    for _ in range(count):
+        hits += bool(jit.closure(sample_grid(rng, (n,) * dim, p), threshold).all())
+    return hits
+
+
+def estimate(n, dim=2, threshold=None, seed=0, batch=64, task_size=8, max_samples=1024,
+             tol=1e-3, z=2.576, pool=None, log=None):
+    """
+    Bisect for p_c(n). Returns a dict with the estimate, the bracket
+    (interval) and every probe as (p, successes, trials, low, high).
+    """
+    threshold = dim if threshold is None else threshold
+    run = pool.imap_unordered if pool is not None else map
+    lo, hi = 0.0, 1.0
+    probe_lo = probe_hi = None
+    probes = []
+    settled = True
+    k = 0
+    while hi - lo > tol:
+        p = (lo + hi) / 2
+        successes = trials = 0
+        b = 0
+        while True:
+            tasks = [(n, dim, p, threshold, seed, (n, k, b, t), min(task_size, batch - t * task_size))
+                     for t in range(-(-batch // task_size))]
+            successes += sum(run(_task, tasks))
+            trials += batch
+            low, high = wilson(successes, trials, z)
+            if high < 0.5 or low > 0.5 or trials >= max_samples:
+                break
+            b += 1
+        probe = Probe(p, successes, trials, low, high)
+        probes.append(probe)
+        if log:
+            log(f"n={n} p={p:.6f} {successes}/{trials} percolate  [{low:.3f}, {high:.3f}]")
+        k += 1
+        if high < 0.5:
+            lo, probe_lo = p, probe
+        elif low > 0.5:
+            hi, probe_hi = p, probe
+        else:
+            settled = False
+            break
+
+    if not settled:
+        p_c = probes[-1].p
+    else:
+        # Interpolate the percolation probability linearly across the bracket.
+        f_lo = probe_lo.successes / probe_lo.trials if probe_lo else 0.0
+        f_hi = probe_hi.successes / probe_hi.trials if probe_hi else 1.0
+        p_c = lo + (hi - lo) * (0.5 - f_lo) / (f_hi - f_lo) if f_hi > f_lo else (lo + hi) / 2
+    return {
+        "n": n, "dim": dim, "threshold": threshold, "p_c": p_c, "interval": [lo, hi],
+        "settled": settled, "confidence_z": z, "probes": [list(pr) for pr in probes],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the critical seed density p_c(n).")
+    parser.add_argument("--n", nargs="+", type=int, required=True)
+    parser.add_argument("--dim", type=int, default=2)
+    parser.add_argument("--threshold", type=int, help="default: the dimension")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch", type=int, default=64, help="grids sampled per round at a probe")
+    parser.add_argument("--task-size", type=int, default=8, help="grids per worker task")
+    parser.add_argument("--max-samples", type=int, default=1024, help="grids per probe before giving up")
+    parser.add_argument("--tol", type=float, default=1e-3, help="stop when the bracket is this narrow")
+    parser.add_argument("--z", type=float, default=2.576, help="Wilson interval z (2.576 = 99%%)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    log = lambda msg: print(msg, flush=True)
+    pool = multiprocessing.Pool(args.workers) if args.workers > 1 else None
+    try:
+        results = [estimate(n, args.dim, args.threshold, args.seed, args.batch, args.task_size,
+                            args.max_samples, args.tol, args.z, pool, log) for n in args.n]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    for r in results:
+        lo, hi = r["interval"]
+        note = "" if r["settled"] else "  (probe budget reached)"
+        print(f"n={r['n']}: p_c ≈ {r['p_c']:.5f}  in [{lo:.5f}, {hi:.5f}]{note}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
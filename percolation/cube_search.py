@@ -0,0 +1,225 @@
+"""
+Search over permutation stacks for the N×N×N cube of cube_slices_trial.
+
+A stack is an (N, N) integer array: slice z infects (row r, col stack[z][r]).
+Stacks are evaluated in batches with the vectorised engine; a candidate
+drops out of its batch as soon as it stalls (a generation with no new
+infections), runs past the generation budget, or (for threshold >= 3) its
+surface area drops below the cube's, which proves it can never fill.
+
+Symmetry reduction uses the cube symmetries that keep a stack a stack:
+reversing the rows, reversing the columns, transposing each slice (which
+inverts every permutation) and reversing the slice order, 16 in all. Arbitrary
+row/column relabelings are not used because they change adjacency.
+
+    python -m percolation.cube_search --n 4 --threshold 3 --mode exhaustive
+    python -m percolation.cube_search --n 6 --threshold 3 --mode random --samples 200000 --workers 8
+"""
+import argparse
+import itertools
+import multiprocessing
+
+import numpy as np
+
+from .engine import permutation_stack
+from .termination import batch_generations
+
+
+# ---------------------------
+# Symmetry
+# ---------------------------
+
+def symmetric_variants(stacks):
+    """All 16 images of a batch of stacks, shape (16, B, N, N)."""
+    stacks = np.asarray(stacks)
+    n = stacks.shape[-1]
+    variants = []
+    for transpose in (False, True):
+        base = np.argsort(stacks, axis=-1) if transpose else stacks
+        for flip_rows in (False, True):
+            rows = base[..., ::-1] if flip_rows else base
+            for flip_cols in (False, True):
+                cols = n - 1 - rows if flip_cols else rows
+                variants.append(cols)
+                variants.append(cols[..., ::-1, :])
+    return np.stack(variants)
+
+
+def canonical(stacks):
+    """Lexicographically smallest symmetric image of every stack in the batch."""
+    variants = symmetric_variants(stacks)
+    k, b = variants.shape[:2]
+    flat = variants.reshape(k, b, -1)
+    best = flat[0].copy()
+    for v in flat[1:]:
+        diff = v != best
+        first = diff.argmax(axis=1)
+        rows = np.arange(b)
+        smaller = diff.any(axis=1) & (v[rows, first] < best[rows, first])
+        best[smaller] = v[smaller]
+    return best.reshape(np.shape(stacks))
+
+
+# ---------------------------
+# Evaluation
+# ---------------------------
+
+def stack_generations(stacks, threshold=3, max_generations=None):
+    """
+    Generations each stack needs to fill its cube; -1 when the run stalls
+    before filling the cube, is proved hopeless, or exceeds `max_generations`.
+    """
+    return batch_generations(permutation_stack(stacks), threshold, max_generations)
+
+
+def _evaluate_chunk(args):
+    stacks, threshold, max_generations = args
+    return stacks, stack_generations(stacks, threshold, max_generations)
+
+
+# ---------------------------
+# Candidate sources
+# ---------------------------
+
+def exhaustive_stacks(n, chunk_size=4096):
+    """Every stack up to symmetry, in chunks. Only practical for n <= 4."""
+    perms = np.array(list(itertools.permutations(range(n))))
+    seen = set()
+    chunk = []
+    for combo in itertools.product(range(len(perms)), repeat=n):
+        chunk.append(combo)
+        if len(chunk) == chunk_size:
+            yield from _unique_chunk(perms[np.array(chunk)], seen)
+            chunk = []
+    if chunk:
+        yield from _unique_chunk(perms[np.array(chunk)], seen)
+
+
+def _unique_chunk(stacks, seen):
+    canon = canonical(stacks)
+    fresh = []
+    for s in canon:
+        key = s.tobytes()
+        if key not in seen:
+            seen.add(key)
+            fresh.append(s)
+    if fresh:
+        yield np.array(fresh)
+
+
+def random_stacks(n, samples, chunk_size=4096, seed=0):
+    """`samples` uniformly random stacks (canonicalised), in chunks."""
+    rng = np.random.default_rng(seed)
+    done = 0
+    while done < samples:
+        size = min(chunk_size, samples - done)
+        keys = rng.random((size, n, n))
+        yield canonical(np.argsort(keys, axis=-1))
+        done += size
+
+
+def swap_neighbours(stack):
+    """All stacks one transposition away from `stack` (one swap in one slice)."""
+    stack = np.asarray(stack)
+    n = stack.shape[-1]
+    out = []
+    for z in range(n):
+        for i, j in itertools.combinations(range(n), 2):
+            s = stack.copy()
+            s[z, i], s[z, j] = s[z, j], s[z, i]
+            out.append(s)
+    return np.array(out)
+
+
+def improve(stack, threshold=3, max_rounds=100):
+    """
+    Steepest-descent hill climb over single swaps. Returns (stack, generations)
+    of the local optimum; a non-percolating start is treated as infinitely slow.
+    """
+    stack = np.asarray(stack)
+    best = stack_generations(stack[None], threshold)[0]
+    for _ in range(max_rounds):
+        budget = None if best < 0 else best - 1
+        cand = swap_neighbours(stack)
+        gens = stack_generations(cand, threshold, budget)
+        ok = np.flatnonzero(gens >= 0)
+        if not ok.size:
+            break
+        i = ok[gens[ok].argmin()]
+        stack, best = cand[i], gens[i]
+    return canonical(stack[None])[0], int(best)
+
+
+# ---------------------------
+# Search
+# ---------------------------
+
+def search(chunks, threshold=3, max_generations=None, workers=1, top=10):
+    """
+    Evaluate candidate chunks and return (results, stats): `results` are the
+    `top` fastest percolating stacks as (generations, stack) pairs, stats
+    count candidates seen and percolating.
+    """
+    jobs = ((chunk, threshold, max_generations) for chunk in chunks)
+    results = []
+    stats = {"candidates": 0, "percolating": 0}
+
+    def collect(stacks, gens):
+        stats["candidates"] += len(stacks)
+        ok = np.flatnonzero(gens >= 0)
+        stats["percolating"] += ok.size
+        results.extend((int(gens[i]), stacks[i].tolist()) for i in ok)
+        results.sort(key=lambda x: x[0])
+        del results[top:]
+
+    if workers == 1:
+        for job in jobs:
+            collect(*_evaluate_chunk(job))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for stacks, gens in pool.imap_unordered(_evaluate_chunk, jobs):
+                collect(stacks, gens)
+    return results, stats
+
+
+def format_perms(stack):
+    """A stack as Python source for cube_slices_trial.PERMS."""
+    rows = "\n".join(f"    {[int(c) for c in p]}," for p in stack)
+    return f"PERMS = [\n{rows}\n]"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search permutation stacks for fast-percolating cubes.")
+    parser.add_argument("--n", type=int, default=6)
+    parser.add_argument("--threshold", type=int, default=3)
+    parser.add_argument("--mode", choices=["exhaustive", "random"], default="random")
+    parser.add_argument("--samples", type=int, default=100000, help="random mode: number of stacks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-generations", type=int, default=None, help="abort candidates past this budget")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--improve", action="store_true", help="hill-climb from each reported stack")
+    args = parser.parse_args(argv)
+
+    if args.mode == "exhaustive":
+        chunks = exhaustive_stacks(args.n)
+    else:
+        chunks = random_stacks(args.n, args.samples, seed=args.seed)
+
+    results, stats = search(chunks, args.threshold, args.max_generations, args.workers, args.top)
+    if args.improve:
+        improved = {}
+        for _, stack in results:
+            local, gens = improve(stack, args.threshold)
+            improved[local.tobytes()] = (gens, local.tolist())
+        results = sorted(improved.values(), key=lambda x: x[0])
+
+    print(f"{stats['candidates']} candidates, {stats['percolating']} percolate "
+          f"(n={args.n}, threshold={args.threshold})")
+    for gens, stack in results:
+        print(f"\n# {gens} generations")
+        print(format_perms(stack))
+
+
+if __name__ == "__main__":
+    main()
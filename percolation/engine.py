@@ -0,0 +1,171 @@
+"""
+NumPy percolation engine.
+
+Synchronous r-neighbour bootstrap percolation with orthogonal neighbours and a
+closed boundary, on arrays of any dimension: 2D grids are indexed [row, col],
+the 3D cube from cube_slices_trial is indexed [z, row, col] so that one z-slice
+is one contiguous block of memory.
+"""
+import numpy as np
+
+
+# ---------------------------
+# Grids
+# ---------------------------
+
+def grid_from_cells(cells, shape):
+    """Boolean grid of the given shape with every cell in `cells` set."""
+    grid = np.zeros(shape, dtype=bool)
+    cells = list(cells)
+    if cells:
+        grid[tuple(np.array(cells).T)] = True
+    return grid
+
+
+def permutation_stack(perms):
+    """
+    Boolean N×N×N cube for a stack of permutations, indexed [z, row, col].
+    Slice z infects (row r, col perms[z][r]), as in cube_slices_trial.PERMS.
+
+    A batch of stacks, shape (B, N, N), gives a (B, N, N, N) array of cubes.
+    """
+    perms = np.asarray(perms, dtype=np.intp)
+    n = perms.shape[-1]
+    cube = np.zeros(perms.shape + (n,), dtype=bool)
+    idx = np.indices(perms.shape)
+    cube[(*idx, perms)] = True
+    return cube
+
+
+# ---------------------------
+# Step
+# ---------------------------
+
+def neighbor_counts(infected, axes=None):
+    """
+    Number of infected orthogonal neighbours of every cell. `axes` selects the
+    spatial axes (default: all), so a stack of grids can be stepped at once.
+    """
+    counts = np.zeros(infected.shape, dtype=np.uint8)
+    full = [slice(None)] * infected.ndim
+    for axis in range(infected.ndim) if axes is None else axes:
+        lo, hi = list(full), list(full)
+        lo[axis] = slice(None, -1)
+        hi[axis] = slice(1, None)
+        lo, hi = tuple(lo), tuple(hi)
+        counts[lo] += infected[hi]
+        counts[hi] += infected[lo]
+    return counts
+
+
+def step(infected, threshold=2, axes=None):
+    """Cells that become infected in the next generation, as a boolean mask."""
+    return (neighbor_counts(infected, axes) >= threshold) & ~infected
+
+
+# ---------------------------
+# Infection times
+# ---------------------------
+
+def time_dtype(num_cells):
+    """
+    Smallest unsigned dtype for the infection times of a grid with `num_cells`
+    cells. Every generation infects at least one cell, so times stay below
+    num_cells; the dtype's max value is reserved for never-infected cells.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if np.iinfo(dtype).max >= num_cells:
+            return np.dtype(dtype)
+    raise ValueError(f"grid too large: {num_cells} cells")
+
+
+def never(dtype):
+    """Sentinel stored for cells that are never infected."""
+    return np.iinfo(dtype).max
+
+
+def infection_times(seeds, threshold=2, out=None):
+    """
+    Generation at which each cell gets infected (seeds are 0, cells that are
+    never infected hold never(dtype)).
+
+    `out` may be any writable array of the right shape, e.g. an np.memmap
+    from storage.TimesStore; times are written generation by generation, so
+    only the pages holding each generation's cells are touched.
+    """
+    infected = np.array(seeds, dtype=bool)
+    if out is None:
+        out = np.empty(infected.shape, dtype=time_dtype(infected.size))
+    elif out.shape != infected.shape:
+        raise ValueError(f"out has shape {out.shape}, expected {infected.shape}")
+
+    out[...] = never(out.dtype)
+    out[infected] = 0
+
+    gen = 0
+    while True:
+        new = step(infected, threshold)
+        if not new.any():
+            break
+        gen += 1
+        out[new] = gen
+        infected |= new
+    return out
+
+
+def summarize_times(times):
+    """(generations, percolates) for an infection-time array."""
+    infected = times != never(times.dtype)
+    percolates = bool(infected.all())
+    generations = int(times[infected].max()) if infected.any() else 0
+    return generations, percolates
+
+
+# ---------------------------
+# Streaming
+# ---------------------------
+
+def _neighbor_offsets(shape):
+    """(axis, stride, direction) for every orthogonal neighbour in a C-ordered grid."""
+    strides = np.cumprod((shape[1:] + (1,))[::-1])[::-1]
+    return [(axis, int(strides[axis]), d) for axis in range(len(shape)) for d in (-1, 1)]
+
+
+def iter_deltas(seeds, threshold=2, flat=False):
+    """
+    Lazily yield the cells infected in each generation (1, 2, ...), as a tuple
+    of index arrays like np.nonzero, or as flat indices with flat=True.
+
+    Only neighbours of the previous delta are examined, so each generation
+    costs time proportional to its delta; memory is two grid-sized arrays no
+    matter how many generations run. Stop iterating whenever you like.
+    """
+    infected = np.array(seeds, dtype=bool)
+    shape = infected.shape
+    counts = neighbor_counts(infected).reshape(-1)
+    flat_infected = infected.reshape(-1)
+    offsets = _neighbor_offsets(shape)
+
+    delta = np.flatnonzero((counts >= threshold) & ~flat_infected)
+    while delta.size:
+        yield delta if flat else np.unravel_index(delta, shape)
+
+        flat_infected[delta] = True
+        touched = []
+        for axis, stride, d in offsets:
+            coord = (delta // stride) % shape[axis]
+            nb = delta[coord > 0] - stride if d < 0 else delta[coord < shape[axis] - 1] + stride
+            # A delta holds no duplicates, so neither does one shifted copy of it.
+            counts[nb] += 1
+            touched.append(nb)
+        cand = np.unique(np.concatenate(touched))
+        delta = cand[(counts[cand] >= threshold) & ~flat_infected[cand]]
+
+
+def closure(seeds, threshold=2):
+    """Final infected set (outcome only, no generation times)."""
+    infected = np.array(seeds, dtype=bool)
+    flat = infected.reshape(-1)
+    for delta in iter_deltas(seeds, threshold, flat=True):
+        flat[delta] = True
+    return infected
@@ -0,0 +1,184 @@
+"""
+Optional Numba kernels.
+
+When Numba is installed, step(), infection_times() and closure() run as
+compiled loops over flat cell indices (any number of dimensions): a
+generation-by-generation queue for infection times and a depth-first work
+stack on a guard-padded grid for the closure, both touching each cell's neighbours a bounded number of
+times. Compiled code is cached on disk (cache=True), so only the very first
+process on a machine pays for compilation.
+
+Without Numba (or with PERCOLATION_NO_NUMBA=1 set) the same functions fall
+back to the NumPy engine, so callers never need to check.
+"""
+import os
+
+import numpy as np
+
+from . import engine
+from .engine import never, time_dtype
+
+try:
+    if os.environ.get("PERCOLATION_NO_NUMBA"):
+        raise ImportError("disabled by PERCOLATION_NO_NUMBA")
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        return lambda fn: fn
+
+
+# ---------------------------
+# Kernels
+# ---------------------------
+
+@njit(cache=True)
+def _neighbors(i, shape, strides, out):
+    k = 0
+    for a in range(shape.size):
+        c = (i // strides[a]) % shape[a]
+        if c > 0:
+            out[k] = i - strides[a]
+            k += 1
+        if c < shape[a] - 1:
+            out[k] = i + strides[a]
+            k += 1
+    return k
+
+
+@njit(cache=True)
+def _step_kernel(infected, shape, strides, threshold, out):
+    nb = np.empty(2 * shape.size, np.int64)
+    for i in range(infected.size):
+        out[i] = False
+        if infected[i]:
+            continue
+        cnt = 0
+        k = _neighbors(i, shape, strides, nb)
+        for m in range(k):
+            if infected[nb[m]]:
+                cnt += 1
+        out[i] = cnt >= threshold
+
+
+@njit(cache=True)
+def _times_kernel(infected, shape, strides, threshold, times, never_value):
+    size = infected.size
+    nb = np.empty(2 * shape.size, np.int64)
+    counts = np.zeros(size, np.uint8)
+    cur = np.empty(size, np.int64)
+    nxt = np.empty(size, np.int64)
+
+    for i in range(size):
+        times[i] = never_value
+    for i in range(size):
+        if infected[i]:
+            times[i] = 0
+            k = _neighbors(i, shape, strides, nb)
+            for m in range(k):
+                counts[nb[m]] += 1
+
+    ncur = 0
+    for i in range(size):
+        if not infected[i] and counts[i] >= threshold:
+            cur[ncur] = i
+            ncur += 1
+
+    gen = 0
+    while ncur > 0:
+        gen += 1
+        for q in range(ncur):
+            infected[cur[q]] = True
+            times[cur[q]] = gen
+        nnext = 0
+        for q in range(ncur):
+            k = _neighbors(cur[q], shape, strides, nb)
+            for m in range(k):
+                j = nb[m]
+                if not infected[j]:
+                    counts[j] += 1
+                    # Counts only grow, so each cell crosses the threshold once.
+                    if counts[j] == threshold:
+                        nxt[nnext] = j
+                        nnext += 1
+        cur, nxt = nxt, cur
+        ncur = nnext
+    return gen
+
+
+@njit(cache=True)
+def _closure_kernel(state, offsets, threshold, stack):
+    # state is the grid padded by one guard cell per side: 0 healthy, 1 seed,
+    # 2 guard, 3 infected by the closure. Guards are never counted, so
+    # neighbours need no bounds checks.
+    # The closure does not depend on the order cells are processed in; a stack
+    # keeps the work local (cache friendly), where a queue would sweep the grid.
+    counts = np.zeros(state.size, np.uint8)
+    infected = 0
+    for start in range(state.size):
+        if state[start] != 1:
+            continue
+        infected += 1
+        stack[0] = start
+        top = 1
+        while top > 0:
+            top -= 1
+            i = stack[top]
+            for o in offsets:
+                j = i + o
+                if state[j] == 0:
+                    counts[j] += 1
+                    if counts[j] >= threshold:
+                        state[j] = 3
+                        stack[top] = j
+                        top += 1
+                        infected += 1
+    return infected
+
+
+# ---------------------------
+# Public interface
+# ---------------------------
+
+def _layout(shape):
+    shape = np.array(shape, dtype=np.int64)
+    strides = np.ones_like(shape)
+    strides[:-1] = np.cumprod(shape[::-1])[::-1][1:]
+    return shape, strides
+
+
+def step(infected, threshold=2):
+    """Same as engine.step."""
+    if not HAVE_NUMBA:
+        return engine.step(infected, threshold)
+    infected = np.ascontiguousarray(infected, dtype=bool)
+    out = np.empty(infected.shape, dtype=bool)
+    _step_kernel(infected.reshape(-1), *_layout(infected.shape), threshold, out.reshape(-1))
+    return out
+
+
+def infection_times(seeds, threshold=2):
+    """Same as engine.infection_times."""
+    if not HAVE_NUMBA:
+        return engine.infection_times(seeds, threshold)
+    infected = np.array(seeds, dtype=bool)
+    dtype = time_dtype(infected.size)
+    times = np.empty(infected.shape, dtype=dtype)
+    _times_kernel(infected.reshape(-1), *_layout(infected.shape), threshold, times.reshape(-1), never(dtype))
+    return times
+
+
+def closure(seeds, threshold=2):
+    """Same as engine.closure: the final infected set."""
+    if not HAVE_NUMBA:
+        return engine.closure(seeds, threshold)
+    seeds = np.asarray(seeds, dtype=bool)
+    state = np.pad(seeds.view(np.uint8), 1, constant_values=2)
+    strides = _layout(state.shape)[1]
+    offsets = np.concatenate([-strides, strides])
+    # Every cell enters the stack at most once; int32 halves its size on big grids.
+    stack = np.empty(seeds.size, dtype=np.int32 if state.size < 2**31 else np.int64)
+    _closure_kernel(state.reshape(-1), offsets, threshold, stack)
+    return (state[(slice(1, -1),) * seeds.ndim] & 1) == 1
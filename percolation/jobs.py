@@ -0,0 +1,350 @@
+"""
+Resumable, checkpointed search jobs.
+
+A job directory holds `job.json` (task name and parameters) and splits the
+search space into deterministic shards. Workers claim a shard by creating
+`claims/<i>` exclusively, checkpoint their progress and partial bests to
+`partial/<i>.json` after every chunk, and publish `done/<i>.json` when the
+shard is finished. Every file is written to a temporary name and renamed
+into place, so a crash never leaves a torn checkpoint. Any number of
+processes, on one machine or several sharing the directory, can run the same
+job; a claim whose heartbeat is older than --stale seconds is taken over
+by renaming a fresh claim over it. A claim file names its owner, and a
+worker checks that it still owns its shard before every checkpoint, so if two
+workers take over the same stale claim, the one whose rename lost stops
+after at most one chunk. That chunk is the same computation either way.
+
+    python -m percolation.jobs init runs/sets5 sets --n 5
+    python -m percolation.jobs init runs/cube4 stacks --n 4 --threshold 3
+    python -m percolation.jobs run runs/sets5 --workers 4
+    python -m percolation.jobs status runs/sets5
+
+Tasks:
+- sets:   every k-cell seed set on the n×n grid (k defaults to n), sharded
+          by its first `depth` cells in lexicographic order.
+- stacks: every permutation stack for the n×n×n cube of cube_slices_trial,
+          sharded by the first slice, keeping only canonical stacks.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+import numpy as np
+
+from .cube_search import canonical, stack_generations
+from .termination import batch_generations
+
+CHUNK = 4096
+KEEP_BEST = 10
+
+
+# ---------------------------
+# Files
+# ---------------------------
+
+def write_json(path, data):
+    """Atomically replace `path` with `data` as JSON."""
+    tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+# ---------------------------
+# Tasks
+# ---------------------------
+
+class SetsTask:
+    """k-cell seed sets on an n×n grid, sharded by their first `depth` cells."""
+
+    def __init__(self, n, k=None, depth=2, threshold=2, max_generations=None):
+        self.n, self.k, self.depth = n, k or n, min(depth, k or n)
+        self.threshold, self.max_generations = threshold, max_generations
+        cells = n * n
+        self.prefixes = [p for p in itertools.combinations(range(cells), self.depth)
+                         if cells - 1 - p[-1] >= self.k - self.depth]
+
+    def num_shards(self):
+        return len(self.prefixes)
+
+    def candidates(self, shard):
+        prefix = self.prefixes[shard]
+        rest = itertools.combinations(range(prefix[-1] + 1, self.n * self.n), self.k - self.depth)
+        return (prefix + r for r in rest)
+
+    def evaluate(self, chunk):
+        flat = np.array(chunk, dtype=np.intp)
+        grids = np.zeros((len(flat), self.n * self.n), dtype=bool)
+        grids[np.arange(len(flat))[:, None], flat] = True
+        gens = batch_generations(grids.reshape(-1, self.n, self.n), self.threshold, self.max_generations)
+        items = [[divmod(int(i), self.n) for i in row] for row in flat]
+        return gens, items
+
+
+class StacksTask:
+    """Permutation stacks for the n×n×n cube, sharded by the first slice."""
+
+    def __init__(self, n, threshold=3, max_generations=None):
+        self.n, self.threshold, self.max_generations = n, threshold, max_generations
+        self.perms = np.array(list(itertools.permutations(range(n))), dtype=np.intp)
+
+    def num_shards(self):
+        return len(self.perms)
+
+    def candidates(self, shard):
+        return ((shard,) + rest for rest in itertools.product(range(len(self.perms)), repeat=self.n - 1))
+
+    def evaluate(self, chunk):
+        stacks = self.perms[np.array(chunk, dtype=np.intp)]
+        # Only canonical stacks are run; the rest are symmetric copies.
+        keep = (canonical(stacks) == stacks).all(axis=(1, 2))
+        gens = np.full(len(stacks), -2, dtype=np.int64)
+        gens[keep] = stack_generations(stacks[keep], self.threshold, self.max_generations)
+        return gens, stacks.tolist()
+
+
+TASKS = {"sets": SetsTask, "stacks": StacksTask}
+
+
+def load_task(job):
+    return TASKS[job["task"]](**job["params"])
+
+
+# ---------------------------
+# Shards
+# ---------------------------
+
+def empty_state():
+    return {"position": 0, "evaluated": 0, "percolating": 0, "histogram": {}, "best": []}
+
+
+def merge_chunk(state, gens, items, consumed):
+    """Fold one evaluated chunk into a shard state (gens -2 = skipped by symmetry)."""
+    state["position"] += consumed
+    ran = gens != -2
+    state["evaluated"] += int(ran.sum())
+    ok = np.flatnonzero(gens >= 0)
+    state["percolating"] += int(ok.size)
+    for g in gens[ok].tolist():
+        state["histogram"][str(g)] = state["histogram"].get(str(g), 0) + 1
+    best = state["best"] + [[int(gens[i]), items[i]] for i in ok]
+    best.sort(key=lambda x: x[0])
+    state["best"] = best[:KEEP_BEST]
+
+
+class Job:
+    def __init__(self, root):
+        self.root = root
+        self.spec = read_json(os.path.join(root, "job.json"))
+        if self.spec is None:
+            raise FileNotFoundError(f"no job.json in {root}")
+        self.task = load_task(self.spec)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def init(cls, root, task, **params):
+        task_obj = TASKS[task](**params)
+        for sub in ("claims", "partial", "done"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        path = os.path.join(root, "job.json")
+        spec = {"task": task, "params": params, "shards": task_obj.num_shards()}
+        existing = read_json(path)
+        if existing is not None and existing != spec:
+            raise ValueError(f"{root} already holds a different job")
+        write_json(path, spec)
+        return cls(root)
+
+    def _path(self, sub, shard, ext=".json"):
+        return os.path.join(self.root, sub, f"{shard}{ext}")
+
+    def is_done(self, shard):
+        return os.path.exists(self._path("done", shard))
+
+    def owns(self, shard):
+        """Whether the claim on `shard` names this process."""
+        try:
+            with open(self._path("claims", shard, "")) as f:
+                return f.read() == self.owner
+        except FileNotFoundError:
+            return False
+
+    def claim(self, shard, stale):
+        """Try to take `shard`; True if this process now owns it."""
+        path = self._path("claims", shard, "")
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return self._take_over(shard, stale)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.owner)
+        return True
+
+    def _take_over(self, shard, stale):
+        path = self._path("claims", shard, "")
+        try:
+            judged = os.stat(path)
+        except FileNotFoundError:  # released meanwhile
+            return self.claim(shard, stale)
+        if time.time() - judged.st_mtime < stale:
+            return False
+        # Abandoned: rename our own claim over it in one step, unless it changed
+        # since it was judged stale (another worker took it over first).
+        tmp = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.owner)
+        try:
+            current = os.stat(path)
+            if (current.st_ino, current.st_mtime_ns) != (judged.st_ino, judged.st_mtime_ns):
+                return False
+            os.replace(tmp, path)
+        except FileNotFoundError:
+            return self.claim(shard, stale)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        # Two workers can still both pass the check; the last rename wins.
+        return self.owns(shard)
+
+    def release(self, shard):
+        if not self.owns(shard):
+            return
+        try:
+            os.remove(self._path("claims", shard, ""))
+        except FileNotFoundError:
+            pass
+
+    def run_shard(self, shard, chunk_size=CHUNK, log=None):
+        """
+        Run (or resume) one shard to completion, checkpointing every chunk.
+        Returns False if the claim was lost to another worker on the way.
+        """
+        partial = self._path("partial", shard)
+        state = read_json(partial) or empty_state()
+        candidates = itertools.islice(self.task.candidates(shard), state["position"], None)
+        while True:
+            chunk = list(itertools.islice(candidates, chunk_size))
+            if not chunk:
+                break
+            gens, items = self.task.evaluate(chunk)
+            merge_chunk(state, gens, items, len(chunk))
+            if not self.owns(shard):
+                if log:
+                    log(f"shard {shard}: claim taken over by another worker, stopping")
+                return False
+            write_json(partial, state)
+            os.utime(self._path("claims", shard, ""))
+        write_json(self._path("done", shard), state)
+        try:
+            os.remove(partial)
+        except FileNotFoundError:
+            pass
+        if log:
+            log(f"shard {shard}: {state['evaluated']} evaluated, {state['percolating']} percolate")
+        return True
+
+    def work(self, stale=600.0, chunk_size=CHUNK, log=None):
+        """Claim and run shards until none are left."""
+        for shard in range(self.spec["shards"]):
+            if self.is_done(shard) or not self.claim(shard, stale):
+                continue
+            try:
+                if not self.is_done(shard):
+                    self.run_shard(shard, chunk_size, log)
+            finally:
+                self.release(shard)
+
+    def summary(self):
+        """Merged totals over finished and in-progress shards."""
+        total = empty_state()
+        done = 0
+        for shard in range(self.spec["shards"]):
+            state = read_json(self._path("done", shard))
+            if state is not None:
+                done += 1
+            else:
+                state = read_json(self._path("partial", shard))
+            if state is None:
+                continue
+            total["position"] += state["position"]
+            total["evaluated"] += state["evaluated"]
+            total["percolating"] += state["percolating"]
+            for g, c in state["histogram"].items():
+                total["histogram"][g] = total["histogram"].get(g, 0) + c
+            total["best"] = sorted(total["best"] + state["best"], key=lambda x: x[0])[:KEEP_BEST]
+        total["histogram"] = dict(sorted(total["histogram"].items(), key=lambda x: int(x[0])))
+        total["shards_done"] = done
+        total["shards"] = self.spec["shards"]
+        return total
+
+
+def _work(args):
+    root, stale, chunk_size = args
+    Job(root).work(stale, chunk_size, log=lambda msg: print(msg, flush=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resumable sharded search jobs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("init", help="create a job directory")
+    p.add_argument("root")
+    p.add_argument("task", choices=list(TASKS))
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--k", type=int, help="sets: seeds per set (default n)")
+    p.add_argument("--depth", type=int, default=2, help="sets: cells fixed per shard")
+    p.add_argument("--threshold", type=int)
+    p.add_argument("--max-generations", type=int)
+
+    p = sub.add_parser("run", help="work on a job until every shard is done")
+    p.add_argument("root")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--stale", type=float, default=600.0, help="seconds before a silent claim is taken over")
+    p.add_argument("--chunk", type=int, default=CHUNK)
+
+    p = sub.add_parser("status", help="show progress and the best results so far")
+    p.add_argument("root")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        params = {"n": args.n, "max_generations": args.max_generations}
+        if args.task == "sets":
+            params.update(k=args.k, depth=args.depth)
+        if args.threshold is not None:
+            params["threshold"] = args.threshold
+        job = Job.init(args.root, args.task, **params)
+        print(f"{args.root}: {job.spec['shards']} shards")
+    elif args.command == "run":
+        jobs = [(args.root, args.stale, args.chunk)] * args.workers
+        if args.workers == 1:
+            _work(jobs[0])
+        else:
+            with multiprocessing.Pool(args.workers) as pool:
+                pool.map(_work, jobs)
+    else:
+        s = Job(args.root).summary()
+        print(f"{s['shards_done']}/{s['shards']} shards done, {s['position']} candidates seen, "
+              f"{s['evaluated']} evaluated, {s['percolating']} percolate")
+        print("generations histogram:", s["histogram"])
+        for gens, item in s["best"]:
+            print(f"  {gens}: {item}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
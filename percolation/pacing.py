@@ -0,0 +1,66 @@
+"""
+Pacing for animated spreads: how many generations each self.play shows and
+for how long.
+
+With a fixed interval per generation a slow seed set stretches the video
+(and the number of partial movies) linearly: the n×n diagonal takes n - 1
+generations. schedule() keeps one beat per generation while the natural
+length fits the target duration; beyond that it shares the target out in
+proportion to sqrt(cells changed) and merges consecutive generations until
+each beat is at least `min_run_time` long. A scene plays a merged beat as
+one Succession, so every generation is still shown in order, just faster.
+The number of beats is bounded by target / min_run_time whatever the seeds.
+
+    gens = fill_generations(filled, grid_size)
+    for beat in schedule([len(g) for g in gens], target=12):
+        ...  # animate gens[beat.first - 1 : beat.last] in beat.run_time, then wait beat.wait
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import grid_from_cells, iter_deltas
+
+Beat = namedtuple("Beat", ["first", "last", "run_time", "wait"])
+
+
+def fill_generations(filled, grid_size, threshold=2):
+    """Cells infected in each generation 1, 2, ... as lists of (row, col)."""
+    seeds = grid_from_cells(list(filled), (grid_size, grid_size))
+    return [list(zip(r.tolist(), c.tolist())) for r, c in iter_deltas(seeds, threshold)]
+
+
+def schedule(deltas, target=None, run_time=0.3, wait=0.25, min_run_time=0.1):
+    """
+    Beats covering generations 1..len(deltas), where deltas[g - 1] is the
+    number of cells changed in generation g. Each beat animates generations
+    first..last (inclusive) for run_time seconds, then waits. Without a
+    target, or when len(deltas) * (run_time + wait) fits it, every generation
+    gets its own beat with the given run_time and wait.
+    """
+    deltas = np.asarray(list(deltas), dtype=float)
+    count = len(deltas)
+    if count == 0:
+        return []
+    if target is None or count * (run_time + wait) <= target:
+        return [Beat(g, g, run_time, wait) for g in range(1, count + 1)]
+
+    play_share = run_time / (run_time + wait)
+    min_beat = min_run_time / play_share
+    weights = np.sqrt(np.maximum(deltas, 1.0))
+    slots = target * weights / weights.sum()
+
+    groups = []
+    first, length = 1, 0.0
+    for g, slot in enumerate(slots, 1):
+        length += slot
+        if length >= min_beat:
+            groups.append([first, g, length])
+            first, length = g + 1, 0.0
+    if length > 0:
+        if groups:
+            groups[-1][1] = count
+            groups[-1][2] += length
+        else:
+            groups.append([first, count, length])
+    return [Beat(a, b, float(t * play_share), float(t * (1 - play_share))) for a, b, t in groups]
@@ -0,0 +1,104 @@
+"""
+Infection-time heatmaps as RGBA images, for grids too large for one Square
+per cell.
+
+    reveal = Reveal(times)            # times from infection_times()
+    image = reveal.at(12)             # cells infected by generation 12
+    strip, ticks = legend(reveal.last)
+
+Each pixel is coloured by its generation through a colormap lookup table;
+cells not yet reached (and cells never infected) stay at the background
+colour. Grids larger than `max_side` are reduced by blocks first, a block
+taking the earliest time of its cells, so the image never exceeds
+max_side × max_side whatever the grid. Cells are sorted by time once and
+at() only writes the pixels whose state changed since the previous call,
+so sweeping t from 0 to the last generation costs one pass over the image
+in total.
+
+Row 0 of the grid is drawn at the bottom, as in make_grid.
+"""
+import numpy as np
+
+from .engine import never
+
+# Approximations of matplotlib's perceptually uniform maps, as evenly spaced stops.
+VIRIDIS = [(68, 1, 84), (72, 40, 120), (62, 74, 137), (49, 104, 142), (38, 130, 142),
+           (31, 158, 137), (53, 183, 121), (109, 205, 89), (180, 222, 44), (253, 231, 37)]
+INFERNO = [(0, 0, 4), (27, 12, 65), (74, 12, 107), (120, 28, 109), (165, 44, 96),
+           (207, 68, 70), (237, 105, 37), (251, 155, 6), (247, 209, 61), (252, 255, 164)]
+COLORMAPS = {"viridis": VIRIDIS, "inferno": INFERNO}
+
+
+def colormap(stops=VIRIDIS, size=256):
+    """size×4 uint8 RGBA lookup table interpolating the given RGB stops (or a COLORMAPS name)."""
+    stops = np.asarray(COLORMAPS.get(stops, stops) if isinstance(stops, str) else stops, dtype=float)
+    x = np.linspace(0, 1, len(stops))
+    at = np.linspace(0, 1, size)
+    lut = np.empty((size, 4), dtype=np.uint8)
+    for ch in range(3):
+        lut[:, ch] = np.round(np.interp(at, x, stops[:, ch]))
+    lut[:, 3] = 255
+    return lut
+
+
+def reduce_times(times, max_side):
+    """Block minimum of a 2D time array so neither side exceeds max_side."""
+    factor = -(-max(times.shape) // max_side)
+    if factor <= 1:
+        return times
+    rows, cols = (-(-s // factor) * factor for s in times.shape)
+    padded = np.full((rows, cols), never(times.dtype), dtype=times.dtype)
+    padded[:times.shape[0], :times.shape[1]] = times
+    return padded.reshape(rows // factor, factor, cols // factor, factor).min(axis=(1, 3))
+
+
+class Reveal:
+    """Heatmap of a 2D infection-time array, revealed up to a generation with at(t)."""
+
+    def __init__(self, times, lut=None, max_side=1024, background=(0, 0, 0, 0), vmax=None):
+        times = np.asarray(times)
+        if times.ndim != 2:
+            raise ValueError(f"expected a 2D infection-time array, got shape {times.shape}")
+        times = reduce_times(times, max_side)[::-1]
+        reached = times != never(times.dtype)
+        self.last = int(times[reached].max()) if reached.any() else 0
+        vmax = self.last if vmax is None else vmax
+        lut = colormap() if lut is None else lut
+        self.background = np.asarray(background, dtype=np.uint8)
+
+        flat = np.where(reached, times, 0).astype(np.int64).reshape(-1)
+        scale = (len(lut) - 1) / max(vmax, 1)
+        self._colors = lut[np.minimum(flat * scale, len(lut) - 1).astype(np.intp)]
+        cells = np.flatnonzero(reached)
+        order = np.argsort(flat[cells], kind="stable")
+        self._order = cells[order]
+        self._sorted = flat[self._order]
+
+        self.image = np.empty(times.shape + (4,), dtype=np.uint8)
+        self.image[...] = self.background
+        self._pixels = self.image.reshape(-1, 4)
+        self._shown = 0
+
+    def at(self, t):
+        """The image with every cell infected by generation t shown (updated in place)."""
+        shown = int(np.searchsorted(self._sorted, np.floor(t), side="right"))
+        if shown > self._shown:
+            idx = self._order[self._shown:shown]
+            self._pixels[idx] = self._colors[idx]
+        elif shown < self._shown:
+            self._pixels[self._order[shown:self._shown]] = self.background
+        self._shown = shown
+        return self.image
+
+
+def legend(vmax, lut=None, ticks=5):
+    """
+    (strip, [(fraction, generation)]): a vertical len(lut)×1 RGBA colour bar
+    with the highest generation at the top, and up to `ticks` integer labels
+    positioned as fractions of its height from the bottom.
+    """
+    lut = colormap() if lut is None else lut
+    strip = lut[::-1, None, :].copy()
+    vmax = max(int(vmax), 1)
+    values = sorted({int(round(v)) for v in np.linspace(0, vmax, min(ticks, vmax + 1))})
+    return strip, [(v / vmax, v) for v in values]
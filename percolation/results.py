@@ -0,0 +1,273 @@
+"""
+Indexed SQLite store for simulation outcomes.
+
+Each row is one seed set: grid size, dimension, threshold, seed count k,
+generations, whether it percolates, the cells themselves and a hash of the
+set's canonical form under the grid's symmetries (so mirrored or rotated
+copies are stored once). Rows are indexed for range queries over
+(n, dim, threshold, k, generations, percolates) and lookups by hash.
+
+    store = ResultsStore("results.db")
+    store.add_many(records)
+    rows = store.query(n=9, k=9, generations=(None, 6), percolates=True)
+
+    python -m percolation.results results.db partitions --n 9 --pieces 1 2 3
+    python -m percolation.results results.db add --n 8 "6+2=diag:[(2,0,6),(0,6,2)]"
+    python -m percolation.results results.db query --n 9 --k 9 --max-generations 6
+
+DiagonalRace9x9 picks its panels with race_configs() when the
+PERCOLATION_RESULTS environment variable points at a store.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import sqlite3
+import sys
+
+import numpy as np
+
+from .engine import infection_times, summarize_times
+from .seeds import batch_cells, batch_grids, diagonal_partitions, partition_name, to_diagonals
+from .termination import batch_generations
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    n           INTEGER NOT NULL,
+    dim         INTEGER NOT NULL,
+    threshold   INTEGER NOT NULL,
+    k           INTEGER NOT NULL,
+    generations INTEGER NOT NULL,
+    percolates  INTEGER NOT NULL,
+    seed_hash   TEXT NOT NULL,
+    name        TEXT,
+    family      TEXT,
+    cells       TEXT NOT NULL,
+    params      TEXT,
+    UNIQUE (seed_hash, threshold)
+);
+CREATE INDEX IF NOT EXISTS runs_lookup ON runs (n, dim, threshold, k, generations, percolates);
+CREATE INDEX IF NOT EXISTS runs_hash ON runs (seed_hash);
+"""
+
+COLUMNS = ("n", "dim", "threshold", "k", "generations", "percolates", "seed_hash",
+           "name", "family", "cells", "params")
+
+
+# ---------------------------
+# Canonical form
+# ---------------------------
+
+def canonical_cells(cells, n):
+    """Smallest sorted cell list over the axis permutations and flips of an n^d grid."""
+    cells = np.asarray(cells, dtype=np.int64).reshape(len(cells), -1)
+    dim = cells.shape[1]
+    best = None
+    for perm in itertools.permutations(range(dim)):
+        for flips in itertools.product((False, True), repeat=dim):
+            t = cells[:, perm]
+            t = np.where(flips, n - 1 - t, t)
+            t = sorted(map(tuple, t.tolist()))
+            if best is None or t < best:
+                best = t
+    return best
+
+
+def seed_hash(cells, n):
+    key = json.dumps([n, canonical_cells(cells, n)], separators=(",", ":"))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def record(cells, n, threshold, generations, percolates, name=None, family=None, params=None):
+    """Row dict for add_many(); cells are index tuples in the engine's order."""
+    cells = [tuple(int(v) for v in c) for c in cells]
+    return {
+        "n": n, "dim": len(cells[0]) if cells else 2, "threshold": threshold, "k": len(cells),
+        "generations": int(generations), "percolates": int(bool(percolates)),
+        "seed_hash": seed_hash(cells, n), "name": name, "family": family,
+        "cells": json.dumps(cells), "params": None if params is None else json.dumps(params),
+    }
+
+
+# ---------------------------
+# Store
+# ---------------------------
+
+class ResultsStore:
+    def __init__(self, path, readonly=False):
+        self.path = path
+        if readonly:
+            self.db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        else:
+            self.db = sqlite3.connect(path)
+            self.db.executescript(SCHEMA)
+        self.db.row_factory = sqlite3.Row
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_many(self, records):
+        """Insert rows in one transaction; sets already stored (by canonical hash) are skipped."""
+        sql = f"INSERT OR IGNORE INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        with self.db:
+            cur = self.db.executemany(sql, ([r[c] for c in COLUMNS] for r in records))
+        return cur.rowcount
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def query(self, n=None, dim=None, threshold=None, k=None, generations=None, percolates=None,
+              family=None, order="generations", limit=None):
+        """
+        Rows matching every given filter, as dicts with cells and params decoded.
+        `k` and `generations` take a value or an inclusive (lo, hi) range with
+        None for an open end.
+        """
+        where, args = [], []
+        for col, value in (("n", n), ("dim", dim), ("threshold", threshold), ("k", k),
+                           ("generations", generations), ("family", family)):
+            if value is None:
+                continue
+            if isinstance(value, (tuple, list)):
+                lo, hi = value
+                if lo is not None:
+                    where.append(f"{col} >= ?")
+                    args.append(lo)
+                if hi is not None:
+                    where.append(f"{col} <= ?")
+                    args.append(hi)
+            else:
+                where.append(f"{col} = ?")
+                args.append(value)
+        if percolates is not None:
+            where.append("percolates = ?")
+            args.append(int(bool(percolates)))
+        if order not in COLUMNS + ("id",):
+            raise ValueError(f"cannot order by {order!r}")
+
+        sql = "SELECT * FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order}, id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        rows = []
+        for row in self.db.execute(sql, args):
+            row = dict(row)
+            row["percolates"] = bool(row["percolates"])
+            row["cells"] = [tuple(c) for c in json.loads(row["cells"])]
+            row["params"] = None if row["params"] is None else json.loads(row["params"])
+            rows.append(row)
+        return rows
+
+
+# ---------------------------
+# Filling the store
+# ---------------------------
+
+def partition_records(n, pieces=(1, 2, 3), directions=(1,), threshold=2):
+    """Records for every diagonal_partitions member with the given piece counts."""
+    out = []
+    for k in pieces:
+        batch = diagonal_partitions(n, k, directions=directions)
+        grids = batch_grids(batch)
+        gens = batch_generations(grids, threshold)
+        for i, params in enumerate(batch.params):
+            generations, percolates = gens[i], True
+            if generations < 0:
+                generations, percolates = summarize_times(infection_times(grids[i], threshold))
+            out.append(record(batch_cells(batch, i), n, threshold, generations, percolates,
+                              name=partition_name(params[0]), family="diagonal",
+                              params={"diagonals": to_diagonals(*params)}))
+    return out
+
+
+def race_configs(path, n, count=6, k=None, max_generations=None):
+    """
+    Up to `count` percolating diagonal configs on n×n from the store at
+    `path`, spread across the generation range, as DiagonalRace9x9's
+    {"name", "diagonals"} dicts. Empty if there is no store.
+    """
+    if not path:
+        return []
+    try:
+        with ResultsStore(path, readonly=True) as store:
+            rows = store.query(n=n, dim=2, k=k, generations=(None, max_generations),
+                               percolates=True, family="diagonal")
+    except sqlite3.OperationalError:
+        return []
+    # One panel per label: the fastest config of each partition, fastest first.
+    fastest = {}
+    for r in rows:
+        fastest.setdefault(r["name"], r)
+    rows = sorted(fastest.values(), key=lambda r: (r["generations"], r["id"]))
+    if not rows:
+        return []
+    pick = np.unique(np.linspace(0, len(rows) - 1, min(count, len(rows))).round().astype(int))
+    return [{"name": rows[i]["name"], "diagonals": [tuple(d) for d in rows[i]["params"]["diagonals"]]}
+            for i in pick]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexed store of simulation outcomes.")
+    parser.add_argument("db")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("partitions", help="store every diagonal partition of n×n")
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--pieces", nargs="+", type=int, default=[1, 2, 3])
+    p.add_argument("--directions", nargs="+", type=int, default=[1], choices=[1, -1])
+
+    p = sub.add_parser("add", help="run percolation CLI specs and store them")
+    p.add_argument("specs", nargs="+")
+    p.add_argument("--n", type=int)
+    p.add_argument("--threshold", type=int)
+
+    p = sub.add_parser("query", help="print matching rows")
+    for name in ("n", "dim", "threshold", "k", "min-generations", "max-generations", "limit"):
+        p.add_argument(f"--{name}", type=int)
+    p.add_argument("--percolates", type=int, choices=[0, 1])
+    p.add_argument("--family")
+
+    args = parser.parse_args(argv)
+
+    with ResultsStore(args.db) as store:
+        if args.command == "partitions":
+            added = store.add_many(partition_records(args.n, args.pieces, args.directions))
+            print(f"{added} new rows, {len(store)} total")
+        elif args.command == "add":
+            from .cli import parse_spec, resolve_threshold
+            records = []
+            for spec in args.specs:
+                try:
+                    name, seeds, threshold = parse_spec(spec, args.n)
+                    threshold = resolve_threshold(threshold, args.threshold, seeds.ndim)
+                except (ValueError, SyntaxError, OSError) as e:
+                    parser.error(str(e))
+                generations, percolates = summarize_times(infection_times(seeds, threshold))
+                records.append(record(np.argwhere(seeds), seeds.shape[0], threshold,
+                                      generations, percolates, name=name, family="spec"))
+            added = store.add_many(records)
+            print(f"{added} new rows, {len(store)} total")
+        else:
+            rows = store.query(n=args.n, dim=args.dim, threshold=args.threshold, k=args.k,
+                               generations=(args.min_generations, args.max_generations),
+                               percolates=None if args.percolates is None else bool(args.percolates),
+                               family=args.family, limit=args.limit)
+            for r in rows:
+                status = "percolates" if r["percolates"] else "stalls"
+                print(f"{r['name'] or r['seed_hash'][:12]}: n={r['n']} dim={r['dim']} r={r['threshold']} "
+                      f"k={r['k']} {status} after {r['generations']} generations")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+General neighbourhood rules: a stencil of offsets, a threshold and a
+boundary mode ("closed" or "torus").
+
+A Rule compiles to a step function, either a shifted-sum convolution on
+NumPy arrays (any stencil, either boundary) or a bit-parallel kernel on
+bitboard integers (closed boundary), with no per-cell Python loop:
+
+    rule = Rule.moore(threshold=3)
+    times = rule.infection_times(seeds)
+    times = Rule.anisotropic(1, 2, threshold=3).infection_times(seeds, backend="bitboard")
+
+Rule.von_neumann(2, threshold=2) is the rule of the video and agrees with
+engine.infection_times.
+"""
+import itertools
+
+import numpy as np
+
+from . import bitboard
+from .engine import never, time_dtype
+
+BOUNDARIES = ("closed", "torus")
+
+
+class Rule:
+    """Neighbourhood stencil (offset tuples), threshold and boundary mode."""
+
+    def __init__(self, offsets, threshold, boundary="closed"):
+        offsets = sorted({tuple(int(v) for v in o) for o in offsets})
+        if not offsets or len({len(o) for o in offsets}) != 1:
+            raise ValueError("offsets must be non-empty and all of the same dimension")
+        if any(not any(o) for o in offsets):
+            raise ValueError("the zero offset is not a neighbour")
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"boundary must be one of {BOUNDARIES}")
+        if not 1 <= threshold <= len(offsets):
+            raise ValueError(f"threshold must be between 1 and {len(offsets)}")
+        self.offsets = tuple(offsets)
+        self.ndim = len(offsets[0])
+        self.threshold = threshold
+        self.boundary = boundary
+
+    def __repr__(self):
+        return f"Rule({len(self.offsets)} offsets, threshold={self.threshold}, boundary={self.boundary!r})"
+
+    # ---------------------------
+    # Standard neighbourhoods
+    # ---------------------------
+
+    @classmethod
+    def von_neumann(cls, ndim=2, threshold=2, boundary="closed", radius=1):
+        """Offsets with l1 norm 1..radius (the 4 / 6 orthogonal neighbours for radius 1)."""
+        offsets = [o for o in itertools.product(range(-radius, radius + 1), repeat=ndim)
+                   if 0 < sum(map(abs, o)) <= radius]
+        return cls(offsets, threshold, boundary)
+
+    @classmethod
+    def moore(cls, ndim=2, threshold=3, boundary="closed", radius=1):
+        """Offsets with l-infinity norm 1..radius (the 8 surrounding cells for radius 1)."""
+        offsets = [o for o in itertools.product(range(-radius, radius + 1), repeat=ndim) if any(o)]
+        return cls(offsets, threshold, boundary)
+
+    @classmethod
+    def anisotropic(cls, a, b, threshold=3, boundary="closed"):
+        """
+        The (a, b) anisotropic neighbourhood: `a` cells either side along the
+        row and `b` cells either side along the column.
+        """
+        offsets = [(0, d * i) for i in range(1, a + 1) for d in (-1, 1)]
+        offsets += [(d * j, 0) for j in range(1, b + 1) for d in (-1, 1)]
+        return cls(offsets, threshold, boundary)
+
+    # ---------------------------
+    # NumPy kernel
+    # ---------------------------
+
+    def _check(self, grid):
+        if grid.ndim != self.ndim:
+            raise ValueError(f"rule is {self.ndim}D, grid is {grid.ndim}D")
+
+    def neighbor_counts(self, infected):
+        """Infected cells in each cell's stencil, as a sum of shifted copies."""
+        self._check(infected)
+        counts = np.zeros(infected.shape, dtype=np.uint8 if len(self.offsets) < 256 else np.uint16)
+        for o in self.offsets:
+            if self.boundary == "torus":
+                counts += np.roll(infected, [-v for v in o], axis=tuple(range(self.ndim)))
+                continue
+            dst, src = [], []
+            for v, size in zip(o, infected.shape):
+                if abs(v) >= size:
+                    break
+                dst.append(slice(max(0, -v), size - max(0, v)))
+                src.append(slice(max(0, v), size - max(0, -v)))
+            else:
+                counts[tuple(dst)] += infected[tuple(src)]
+        return counts
+
+    def step(self, infected):
+        """Cells that become infected in the next generation."""
+        return (self.neighbor_counts(infected) >= self.threshold) & ~infected
+
+    # ---------------------------
+    # Bit-parallel kernel
+    # ---------------------------
+
+    def compile_bitboard(self, shape):
+        """
+        (layout, step) where step(board) -> board of newly infected cells
+        on bitboard.Layout integers. Closed boundary only.
+        """
+        if self.boundary != "closed":
+            raise ValueError("the bitboard kernel supports the closed boundary only")
+        if len(shape) != self.ndim:
+            raise ValueError(f"rule is {self.ndim}D, shape is {len(shape)}D")
+        reach = max(abs(v) for o in self.offsets for v in o[1:]) if self.ndim > 1 else 0
+        layout = bitboard.Layout(shape, guard=max(reach, 1))
+        shifts = [sum(v * s for v, s in zip(o, layout.strides)) for o in self.offsets]
+        valid, threshold = layout.valid, self.threshold
+
+        def step(board):
+            counted = [bitboard.shift(board, s) & valid for s in shifts]
+            return bitboard.at_least(counted, threshold) & valid & ~board
+
+        return layout, step
+
+    # ---------------------------
+    # Runs
+    # ---------------------------
+
+    def infection_times(self, seeds, backend="numpy"):
+        """Infection generation of every cell (never(dtype) if never infected)."""
+        infected = np.array(seeds, dtype=bool)
+        self._check(infected)
+        dtype = time_dtype(infected.size)
+        times = np.full(infected.size, never(dtype), dtype=dtype)
+        times[infected.reshape(-1)] = 0
+
+        gen = 0
+        if backend == "numpy":
+            flat = infected.reshape(-1)
+            while True:
+                new = self.step(infected).reshape(-1)
+                if not new.any():
+                    break
+                gen += 1
+                times[new] = gen
+                flat |= new
+        elif backend == "bitboard":
+            layout, step = self.compile_bitboard(infected.shape)
+            board = layout.pack(infected)
+            while True:
+                new = step(board)
+                if not new:
+                    break
+                gen += 1
+                times[layout.unpack_flat(new)] = gen
+                board |= new
+        else:
+            raise ValueError(f"unknown backend {backend!r}")
+        return times.reshape(infected.shape)
@@ -0,0 +1,178 @@
+"""
+Parametric seed families, expanded in bulk.
+
+Every family returns a SeedBatch: `params` describes each member, `index`
+is a (batch, row, col) triple of index arrays covering all members at once
+and `shape` is (B, n, n). batch_grids() turns a batch into a (B, n, n)
+boolean array for the batched engine (termination.batch_generations runs a
+whole family at once); batch_cells() gives one member as a list of
+(row, col) tuples for the scenes.
+"""
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+SeedBatch = namedtuple("SeedBatch", ["params", "index", "shape"])
+
+
+def batch_grids(batch):
+    grids = np.zeros(batch.shape, dtype=bool)
+    grids[batch.index] = True
+    return grids
+
+
+def batch_cells(batch, i):
+    b, r, c = batch.index
+    keep = b == i
+    return list(zip(r[keep].tolist(), c[keep].tolist()))
+
+
+def _from_perms(params, perms):
+    """Batch of permutation matrices: member b infects (perms[b][col], col)."""
+    perms = np.asarray(perms, dtype=np.intp)
+    count, n = perms.shape
+    b, c = np.indices(perms.shape).reshape(2, -1)
+    return SeedBatch(params, (b, perms.reshape(-1), c), (count, n, n))
+
+
+# ---------------------------
+# Diagonals
+# ---------------------------
+
+def diagonal_cells(diagonals, grid_size):
+    """
+    Vectorised seed_from_diagonals: the same (start_row, start_col, length[,
+    direction]) encoding, returned as (rows, cols) index arrays.
+    """
+    info = np.array([d if len(d) == 4 else (*d, 1) for d in diagonals], dtype=np.intp).reshape(-1, 4)
+    start_r, start_c, length, direction = info.T
+    piece = np.repeat(np.arange(len(info)), length)
+    i = np.arange(piece.size) - np.repeat(np.cumsum(length) - length, length)
+    r = start_r[piece] + i * direction[piece]
+    c = start_c[piece] + i
+    keep = (r >= 0) & (r < grid_size) & (c >= 0) & (c < grid_size)
+    flat = np.unique(r[keep] * grid_size + c[keep])
+    return flat // grid_size, flat % grid_size
+
+
+def compositions(n, k):
+    """All compositions of n into k positive parts, shape (C(n-1, k-1), k)."""
+    cuts = list(itertools.combinations(range(1, n), k - 1))
+    cuts = np.array(cuts, dtype=np.intp).reshape(len(cuts), k - 1)
+    edges = np.hstack([np.zeros((len(cuts), 1), np.intp), cuts, np.full((len(cuts), 1), n)])
+    return np.diff(edges, axis=1)
+
+
+def diagonal_partitions(n, k, orders=None, directions=(1,)):
+    """
+    The n-cell diagonal cut into k pieces, as in DiagonalRace and
+    DiagonalRace9x9. Column block i (of length lengths[i]) is drawn as a
+    diagonal in row slot order[i], running down (+1) or up (-1) its block.
+
+    params are (lengths, order, dirs); to_diagonals() turns one into the
+    (start_row, start_col, length, direction) encoding. `orders` defaults to
+    every ordering of the row slots; `directions` lists the allowed signs.
+    """
+    comps = compositions(n, k)
+    orders = np.array(list(itertools.permutations(range(k))) if orders is None else orders, dtype=np.intp)
+    dirs = np.array(list(itertools.product(directions, repeat=k)), dtype=np.intp)
+
+    li, oi, di = np.meshgrid(np.arange(len(comps)), np.arange(len(orders)), np.arange(len(dirs)), indexing="ij")
+    L, O, D = comps[li.ravel()], orders[oi.ravel()], dirs[di.ravel()]
+
+    col_start = np.cumsum(L, axis=1) - L
+    # A piece's rows start after every piece placed in an earlier slot.
+    row_start = (L[:, None, :] * (O[:, None, :] < O[:, :, None])).sum(axis=2)
+
+    cols = np.arange(n)
+    piece = (cols[None, :, None] >= col_start[:, None, :]).sum(axis=2) - 1
+    rows_ = np.arange(len(L))[:, None]
+    offset = cols[None, :] - col_start[rows_, piece]
+    length = L[rows_, piece]
+    perms = row_start[rows_, piece] + np.where(D[rows_, piece] > 0, offset, length - 1 - offset)
+
+    params = [(tuple(l), tuple(o), tuple(d)) for l, o, d in zip(L.tolist(), O.tolist(), D.tolist())]
+    return _from_perms(params, perms)
+
+
+def to_diagonals(lengths, order, dirs):
+    """One diagonal_partitions member in seed_from_diagonals encoding."""
+    out = []
+    col = 0
+    for length, slot, d in zip(lengths, order, dirs):
+        row = sum(l for l, s in zip(lengths, order) if s < slot)
+        out.append((row if d > 0 else row + length - 1, col, length, d))
+        col += length
+    return out
+
+
+def partition_name(lengths):
+    """Race label for a partition, e.g. "6+2"."""
+    return "+".join(str(l) for l in lengths)
+
+
+# ---------------------------
+# Other families
+# ---------------------------
+
+def permutation_matrices(n, count=None, seed=0):
+    """All n! permutation matrices, or `count` random ones."""
+    if count is None:
+        perms = np.array(list(itertools.permutations(range(n))), dtype=np.intp)
+    else:
+        rng = np.random.default_rng(seed)
+        perms = np.argsort(rng.random((count, n)), axis=1)
+    return _from_perms([tuple(p) for p in perms.tolist()], perms)
+
+
+def staircases(n, treads=None):
+    """
+    Monotone staircases of n cells: each tread puts `t` cells two columns
+    apart along a row, and the next tread starts one row down and one
+    column right of the previous tread's last cell. t = 1 is the diagonal.
+    Members whose staircase leaves the grid are clipped.
+    """
+    treads = np.arange(1, n + 1) if treads is None else np.asarray(treads)
+    i = np.arange(n)
+    t = treads[:, None]
+    step, within = i // t, i % t
+    r = step
+    c = step * (2 * t - 1) + 2 * within
+    b = np.broadcast_to(np.arange(len(treads))[:, None], r.shape)
+    keep = c < n
+    return SeedBatch([int(x) for x in treads], (b[keep], r[keep], c[keep]), (len(treads), n, n))
+
+
+def block_augmentations(n, blocks=1):
+    """
+    The diagonal plus `blocks` 2×2 blocks, each made by adding (i, i+1) and
+    (i+1, i) next to diagonal cells, as in ExtraSeedsSpeedup (blocks=1,
+    i = 4 on 10×10). params are the tuples of block positions i.
+    """
+    combos = list(itertools.combinations(range(n - 1), blocks))
+    combos = np.array(combos, dtype=np.intp).reshape(len(combos), blocks)
+    count = len(combos)
+    diag_b = np.repeat(np.arange(count), n)
+    diag = np.tile(np.arange(n), count)
+    blk_b = np.repeat(np.arange(count), blocks)
+    pos = combos.ravel()
+    b = np.concatenate([diag_b, blk_b, blk_b])
+    r = np.concatenate([diag, pos, pos + 1])
+    c = np.concatenate([diag, pos + 1, pos])
+    return SeedBatch([tuple(x) for x in combos.tolist()], (b, r, c), (count, n, n))
+
+
+def random_sets(n, k, count, seed=0):
+    """`count` uniformly random k-cell seed sets."""
+    rng = np.random.default_rng(seed)
+    flat = np.argpartition(rng.random((count, n * n)), k - 1, axis=1)[:, :k]
+    b = np.repeat(np.arange(count), k)
+    return SeedBatch(list(range(count)), (b, *np.divmod(flat.ravel(), n)), (count, n, n))
+
+
+def bernoulli(n, p, count, seed=0):
+    """`count` grids with every cell seeded independently with probability p."""
+    rng = np.random.default_rng(seed)
+    b, r, c = np.nonzero(rng.random((count, n, n)) < p)
+    return SeedBatch(list(range(count)), (b, r, c), (count, n, n))
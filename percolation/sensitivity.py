@@ -0,0 +1,259 @@
+"""
+Seed sensitivity: how the percolation time changes when a single cell is
+added to (or, for a seed, removed from) the seed set, for every cell.
+
+    heat = sensitivity(seeds)            # generations, -1 = no longer percolates
+    python -m percolation.sensitivity --n 10 "diag:[(0,0,10)]" --out heat.npy
+
+Each perturbation starts from the base run's infection times T, which
+satisfy T = 0 on seeds and T(y) = 1 + (r-th smallest T over y's neighbours)
+elsewhere, and only re-evaluates cells whose time actually changes:
+
+- adding a seed can only lower times, so the lowered cells are settled in
+  time order from the new seed (a Dijkstra-style sweep);
+- removing a seed can only raise times: first the cells that lose their
+  support are marked in increasing base time, then only those are re-timed
+  from the infection times of their unaffected neighbours.
+
+The per-cell kernels run under Numba when it is installed (see jit.py).
+"""
+import argparse
+import heapq
+import multiprocessing
+import sys
+
+import numpy as np
+
+from .cli import parse_spec, resolve_threshold
+from .engine import never
+from .jit import _layout, _neighbors, infection_times, njit
+
+INF = np.iinfo(np.int64).max
+
+
+# ---------------------------
+# Kernels
+# ---------------------------
+
+@njit(cache=True)
+def _rth(values, k, r):
+    """r-th smallest of values[:k] (INF if there are fewer than r)."""
+    if k < r:
+        return INF
+    for a in range(r):
+        m = a
+        for b in range(a + 1, k):
+            if values[b] < values[m]:
+                m = b
+        values[a], values[m] = values[m], values[a]
+    return values[r - 1]
+
+
+@njit(cache=True)
+def _lower(cell, V, shape, strides, threshold, mark, touched, nb, nb2, vals):
+    """Make `cell` a seed; returns the number of cells whose time dropped (in touched)."""
+    heap = [(np.int64(0), np.int64(0))]
+    heap.pop()
+    V[cell] = 0
+    mark[cell] = True
+    touched[0] = cell
+    n = 1
+    heapq.heappush(heap, (np.int64(0), np.int64(cell)))
+    while heap:
+        t, y = heapq.heappop(heap)
+        if t != V[y]:
+            continue
+        k = _neighbors(y, shape, strides, nb)
+        for m in range(k):
+            z = nb[m]
+            if V[z] <= t + 1:
+                continue
+            k2 = _neighbors(z, shape, strides, nb2)
+            for q in range(k2):
+                vals[q] = V[nb2[q]]
+            s = _rth(vals, k2, threshold)
+            if s != INF and s + 1 < V[z]:
+                V[z] = s + 1
+                if not mark[z]:
+                    mark[z] = True
+                    touched[n] = z
+                    n += 1
+                heapq.heappush(heap, (V[z], z))
+    return n
+
+
+@njit(cache=True)
+def _raise(cell, V, base, shape, strides, threshold, mark, stamp, sid, counts, touched, nb):
+    """Remove the seed `cell`; returns the number of re-timed cells (in touched)."""
+    heap = [(np.int64(0), np.int64(0))]
+    heap.pop()
+
+    # Cells left with fewer than r unaffected neighbours infected before them.
+    mark[cell] = True
+    touched[0] = cell
+    n = 1
+    heapq.heappush(heap, (np.int64(0), np.int64(cell)))
+    while heap:
+        t, y = heapq.heappop(heap)
+        if stamp[y] == sid:
+            continue
+        stamp[y] = sid
+        k = _neighbors(y, shape, strides, nb)
+        if y != cell:
+            c = 0
+            for m in range(k):
+                if base[nb[m]] < t and not mark[nb[m]]:
+                    c += 1
+            if c >= threshold:
+                continue
+            mark[y] = True
+            touched[n] = y
+            n += 1
+        for m in range(k):
+            z = nb[m]
+            if t < base[z] < INF and stamp[z] != sid:
+                heapq.heappush(heap, (base[z], z))
+
+    # Re-time the affected cells from the arrivals of their neighbours.
+    for i in range(n):
+        V[touched[i]] = INF
+    for i in range(n):
+        k = _neighbors(touched[i], shape, strides, nb)
+        for m in range(k):
+            z = nb[m]
+            if not mark[z] and V[z] < INF and stamp[z] != sid + 1:
+                stamp[z] = sid + 1
+                heapq.heappush(heap, (V[z], z))
+    while heap:
+        t, z = heapq.heappop(heap)
+        k = _neighbors(z, shape, strides, nb)
+        for m in range(k):
+            y = nb[m]
+            if mark[y] and V[y] == INF:
+                counts[y] += 1
+                if counts[y] == threshold:
+                    V[y] = t + 1
+                    heapq.heappush(heap, (V[y], y))
+    for i in range(n):
+        counts[touched[i]] = 0
+    return n
+
+
+@njit(cache=True)
+def _batch_kernel(cells, seeds, base, shape, strides, threshold, base_hist, last, unreached, out):
+    size = base.size
+    V = base.copy()
+    mark = np.zeros(size, np.bool_)
+    stamp = np.full(size, -1, np.int64)
+    counts = np.zeros(size, np.int64)
+    touched = np.empty(size, np.int64)
+    hist = np.zeros(size + 1, np.int64)
+    nb = np.empty(2 * shape.size, np.int64)
+    nb2 = np.empty(2 * shape.size, np.int64)
+    vals = np.empty(2 * shape.size, np.int64)
+
+    for j in range(cells.size):
+        cell = cells[j]
+        if seeds[cell]:
+            n = _raise(cell, V, base, shape, strides, threshold, mark, stamp, 2 * j, counts, touched, nb)
+        else:
+            n = _lower(cell, V, shape, strides, threshold, mark, touched, nb, nb2, vals)
+
+        # Generations and unreached cells, from the base histogram and the changes.
+        hist[:last + 1] = base_hist
+        hi = last
+        left = unreached
+        for i in range(n):
+            y = touched[i]
+            if base[y] < INF:
+                hist[base[y]] -= 1
+            else:
+                left -= 1
+            if V[y] < INF:
+                hist[V[y]] += 1
+                hi = max(hi, V[y])
+            else:
+                left += 1
+            V[y] = base[y]
+            mark[y] = False
+        gens = hi
+        while gens > 0 and hist[gens] == 0:
+            gens -= 1
+        hist[:hi + 1] = 0
+        out[j] = gens if left == 0 else -1
+
+
+# ---------------------------
+# Public interface
+# ---------------------------
+
+_state = None
+
+
+def _init(seeds, threshold, times):
+    global _state
+    seeds = np.ascontiguousarray(seeds, dtype=bool)
+    reached = times.reshape(-1) != never(times.dtype)
+    base = np.where(reached, times.reshape(-1).astype(np.int64), INF)
+    last = int(base[reached].max()) if reached.any() else 0
+    base_hist = np.bincount(base[reached], minlength=last + 1).astype(np.int64)
+    _state = (seeds.reshape(-1), base, *_layout(seeds.shape), threshold, base_hist, last, int((~reached).sum()))
+
+
+def _run(cells):
+    out = np.empty(len(cells), dtype=np.int64)
+    _batch_kernel(np.asarray(cells, dtype=np.int64), *_state, out)
+    return out
+
+
+def sensitivity(seeds, threshold=2, times=None, cells=None, workers=1, chunk_size=256):
+    """
+    Percolation time after toggling each cell (adding non-seeds, removing
+    seeds), as an array shaped like `seeds`; -1 where the perturbed set does
+    not percolate. `cells` restricts the run to some flat indices (others are
+    -1); `times` may pass in the base run's infection times.
+    """
+    seeds = np.asarray(seeds, dtype=bool)
+    if times is None:
+        times = infection_times(seeds, threshold)
+    cells = np.arange(seeds.size) if cells is None else np.asarray(cells, dtype=np.int64)
+    chunks = [cells[i:i + chunk_size] for i in range(0, len(cells), chunk_size)]
+    if workers == 1:
+        _init(seeds, threshold, times)
+        results = [_run(c) for c in chunks]
+    else:
+        with multiprocessing.Pool(workers, _init, (seeds, threshold, times)) as pool:
+            results = pool.map(_run, chunks)
+    heat = np.full(seeds.size, -1, dtype=np.int64)
+    if chunks:
+        heat[cells] = np.concatenate(results)
+    return heat.reshape(seeds.shape)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Percolation time after adding/removing each cell.")
+    parser.add_argument("spec", help="[NAME=]KIND:VALUE as in python -m percolation")
+    parser.add_argument("--n", type=int)
+    parser.add_argument("--threshold", type=int)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--out", help="save the heatmap as .npy")
+    args = parser.parse_args(argv)
+
+    try:
+        _, seeds, threshold = parse_spec(args.spec, args.n)
+        threshold = resolve_threshold(threshold, args.threshold, seeds.ndim)
+    except (ValueError, SyntaxError, OSError) as e:
+        parser.error(str(e))
+    heat = sensitivity(seeds, threshold, workers=args.workers)
+    if args.out:
+        np.save(args.out, heat)
+    elif heat.ndim == 2:
+        for row in heat:
+            print(" ".join(f"{v:3d}" for v in row))
+    else:
+        print(heat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Memory-mapped storage for infection-time arrays.
+
+Each run is one `.npy` file (so dtype and shape travel with the data) plus a
+small `.json` sidecar with the run's metadata. Files are written through an
+np.memmap and opened read-only with mmap_mode="r", so scenes and analysis
+code can slice a run (e.g. `store.open("cube")[z]` for one z-slice of the
+[z, row, col] cube) and only the pages they read are loaded.
+"""
+import json
+import os
+import re
+
+import numpy as np
+
+from .engine import infection_times, summarize_times, time_dtype
+
+_KEY_RE = re.compile(r"^[A-Za-z0-9_.+-]+$")
+
+
+class TimesStore:
+    """A directory of memory-mapped infection-time arrays, keyed by run name."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key, ext):
+        if not _KEY_RE.match(key):
+            raise ValueError(f"invalid run key: {key!r}")
+        return os.path.join(self.root, key + ext)
+
+    def create(self, key, shape):
+        """New writable memmap for `key`, with the smallest dtype for `shape`."""
+        dtype = time_dtype(int(np.prod(shape)))
+        return np.lib.format.open_memmap(self._path(key, ".npy"), mode="w+", dtype=dtype, shape=tuple(shape))
+
+    def record(self, key, seeds, threshold=2):
+        """Simulate `seeds` straight into a memmap for `key`; returns its metadata."""
+        seeds = np.asarray(seeds, dtype=bool)
+        times = self.create(key, seeds.shape)
+        infection_times(seeds, threshold, out=times)
+        times.flush()
+
+        generations, percolates = summarize_times(times)
+        del times
+
+        meta = {
+            "shape": list(seeds.shape),
+            "threshold": threshold,
+            "seeds": int(seeds.sum()),
+            "generations": generations,
+            "percolates": percolates,
+        }
+        with open(self._path(key, ".json"), "w") as f:
+            json.dump(meta, f)
+        return meta
+
+    def open(self, key, mode="r"):
+        """Zero-copy view of a stored run (read-only unless mode="r+")."""
+        return np.load(self._path(key, ".npy"), mmap_mode=mode)
+
+    def meta(self, key):
+        with open(self._path(key, ".json")) as f:
+            return json.load(f)
+
+    def keys(self):
+        return sorted(name[:-4] for name in os.listdir(self.root) if name.endswith(".npy"))
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key, ".npy"))
@@ -0,0 +1,182 @@
+"""
+Early termination with certificates.
+
+simulate() runs the engine but stops as soon as it can prove the outcome:
+
+- "perimeter": with threshold >= number of dimensions, every infection
+  changes the boundary by 2*d - 2*(infected neighbours) <= 0, so once the
+  boundary is below the full grid's boundary the run can never percolate
+  (this is the PerimeterInvariance argument, and its surface-area version
+  for the THRESHOLD = 3 cube).
+- "rectangles": for 2D threshold 2, the closure of any set is a union of
+  rectangles at l1 distance >= 3 from each other. The rectangles process
+  finds them from the seeds alone; if they are not the whole grid, that list
+  is a certificate anyone can check in O(R^2).
+- "stalled": a generation with no new infections (empty frontier); the
+  stable infected set is the certificate.
+
+A `max_generations` budget aborts undecided runs with reason "budget".
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import step
+
+Outcome = namedtuple("Outcome", ["percolates", "generations", "reason", "certificate"])
+Outcome.__doc__ = """
+percolates is True/False, or None when the budget ran out first; generations
+is how many were simulated; reason is "full", "perimeter", "rectangles",
+"stalled" or "budget".
+"""
+
+RECTANGLE_SEED_LIMIT = 4096
+
+
+# ---------------------------
+# Perimeter bound
+# ---------------------------
+
+def boundary_size(infected, axes=None):
+    """
+    Number of cell faces between an infected cell and a healthy cell or the
+    edge of the grid. With `axes`, counts per grid of a stacked batch.
+    """
+    axes = tuple(range(infected.ndim)) if axes is None else tuple(axes)
+    full = [slice(None)] * infected.ndim
+    cells = np.count_nonzero(infected, axis=axes)
+    pairs = 0
+    for axis in axes:
+        lo, hi = list(full), list(full)
+        lo[axis] = slice(None, -1)
+        hi[axis] = slice(1, None)
+        pairs = pairs + np.count_nonzero(infected[tuple(lo)] & infected[tuple(hi)], axis=axes)
+    return 2 * len(axes) * cells - 2 * pairs
+
+
+def full_boundary(shape):
+    """Boundary of the completely infected grid."""
+    shape = tuple(shape)
+    return 2 * sum(int(np.prod(shape)) // side for side in shape)
+
+
+def perimeter_applies(ndim, threshold):
+    """Whether the boundary is non-increasing under this rule."""
+    return threshold >= ndim
+
+
+# ---------------------------
+# Rectangles process (2D, threshold 2)
+# ---------------------------
+
+def rectangles_interact(a, b):
+    """Whether inclusive rectangles (r0, c0, r1, c1) merge under the 2-neighbour rule."""
+    dr = max(0, b[0] - a[2], a[0] - b[2])
+    dc = max(0, b[1] - a[3], a[1] - b[3])
+    return dr + dc <= 2
+
+
+def closure_rectangles(cells):
+    """
+    Final infected set of 2D 2-neighbour percolation from `cells`, as a list
+    of pairwise non-interacting inclusive rectangles (r0, c0, r1, c1).
+    """
+    rects = np.array([(r, c, r, c) for r, c in cells], dtype=np.int64).reshape(-1, 4)
+    done = []
+    while len(rects):
+        cur, rects = rects[0], rects[1:]
+        while True:
+            dr = np.maximum(0, np.maximum(rects[:, 0] - cur[2], cur[0] - rects[:, 2]))
+            dc = np.maximum(0, np.maximum(rects[:, 1] - cur[3], cur[1] - rects[:, 3]))
+            hit = dr + dc <= 2
+            if not hit.any():
+                break
+            merged = np.vstack([rects[hit], cur[None]])
+            cur = np.concatenate([merged[:, :2].min(axis=0), merged[:, 2:].max(axis=0)])
+            rects = rects[~hit]
+            # The span may now reach rectangles that were already closed.
+            if done:
+                rects = np.vstack([rects, np.array(done)])
+                done = []
+        done.append(cur)
+    return [tuple(int(v) for v in r) for r in done]
+
+
+def verify_rectangles(rects, cells, shape):
+    """Check a "rectangles" certificate: it proves `cells` never fill `shape`."""
+    rows, cols = shape
+    if any(r == (0, 0, rows - 1, cols - 1) for r in rects):
+        return False
+    for i, a in enumerate(rects):
+        for b in rects[i + 1:]:
+            if rectangles_interact(a, b):
+                return False
+    return all(any(r0 <= r <= r1 and c0 <= c <= c1 for r0, c0, r1, c1 in rects) for r, c in cells)
+
+
+# ---------------------------
+# Simulation
+# ---------------------------
+
+def simulate(seeds, threshold=2, max_generations=None, certify=True):
+    """
+    Run from a boolean seed grid until it fills, is proved hopeless, stalls or
+    exceeds `max_generations`. Returns an Outcome.
+    """
+    infected = np.array(seeds, dtype=bool)
+    use_perimeter = certify and perimeter_applies(infected.ndim, threshold)
+    target = full_boundary(infected.shape)
+
+    if certify and infected.ndim == 2 and threshold == 2:
+        cells = np.argwhere(infected)
+        if len(cells) <= RECTANGLE_SEED_LIMIT:
+            rects = closure_rectangles(cells)
+            if rects != [(0, 0, infected.shape[0] - 1, infected.shape[1] - 1)]:
+                return Outcome(False, 0, "rectangles", rects)
+
+    gen = 0
+    while True:
+        if infected.all():
+            return Outcome(True, gen, "full", None)
+        if use_perimeter:
+            boundary = boundary_size(infected)
+            if boundary < target:
+                return Outcome(False, gen, "perimeter", (int(boundary), target))
+        if max_generations is not None and gen >= max_generations:
+            return Outcome(None, gen, "budget", None)
+
+        new = step(infected, threshold)
+        if not new.any():
+            return Outcome(False, gen, "stalled", infected)
+        infected |= new
+        gen += 1
+
+
+def batch_generations(grids, threshold=2, max_generations=None):
+    """
+    Generations each grid in a stacked batch (B, ...) needs to fill; -1 when
+    it stalls, is proved hopeless by the boundary bound, or runs past
+    `max_generations`. Finished and hopeless grids leave the batch early.
+    """
+    grids = np.array(grids, dtype=bool)
+    axes = tuple(range(1, grids.ndim))
+    use_perimeter = perimeter_applies(len(axes), threshold)
+    target = full_boundary(grids.shape[1:])
+    result = np.full(len(grids), -1, dtype=np.int64)
+    active = np.arange(len(grids))
+
+    gen = 0
+    while active.size:
+        full = grids.reshape(len(active), -1).all(axis=1)
+        result[active[full]] = gen
+        if max_generations is not None and gen >= max_generations:
+            break
+
+        new = step(grids, threshold, axes=axes)
+        keep = ~full & new.reshape(len(active), -1).any(axis=1)
+        if use_perimeter:
+            keep &= boundary_size(grids, axes) >= target
+        grids = (grids | new)[keep]
+        active = active[keep]
+        gen += 1
+    return result
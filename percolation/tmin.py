@@ -0,0 +1,258 @@
+"""
+Exact minimum percolation times on small n×n grids (2-neighbour rule):
+T(k), the fewest generations any k-seed set needs to fill the grid, for
+every k from n (the fewest seeds that can percolate) to n².
+
+    python -m percolation.tmin --n 4 5 6 --workers 8 --out tmin.json
+    python -m percolation.tmin --n 4 --check
+
+The search runs the other way round: for each time budget t it finds K(t),
+the fewest seeds that fill the grid within t generations, and T(k) is the
+smallest t with K(t) <= k. K(t) is found by depth-first branch-and-bound
+over cells in row-major order (seed or not), on grids packed into one
+64-bit word (row stride n + 1, so n <= 7):
+
+- a branch is cut when even seeding every undecided cell leaves some cell
+  uninfected after t generations; seeding a cell does not change that
+  optimistic set, so only the "no seed" child is re-simulated;
+- a branch is cut when its seeds plus a lower bound for the rows below
+  reach the best set found so far. Cells t or more rows below row r are
+  infected (or not) within t generations by seeds in rows >= r alone, so
+  the fewest seeds in rows >= r that fill rows >= r + t is a bound; these
+  smaller problems are solved first, bottom up, and memoized per (n, t);
+- K(t - 1) >= K(t) starts the bound, and K(t) >= n (the perimeter bound)
+  ends the search as soon as an n-seed set is found.
+
+The first row is split across a process pool, one task per row pattern up
+to left-right mirroring, and workers share the best size found in a shared
+array the kernel re-reads, so a good set found by one task prunes all the
+others. The kernels are compiled with Numba when it is installed: n = 7
+takes about ten seconds on one core. The pure Python fallback gives the
+same table about a hundred times slower.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from .jit import HAVE_NUMBA, njit
+
+MAX_N = 7  # rows of n + 1 bits must fit in one int64
+
+_shared = None
+
+
+# ---------------------------
+# Kernels
+# ---------------------------
+
+@njit(cache=True)
+def _fills(seeds, valid, demand, width, generations):
+    """Whether every `demand` cell is infected within `generations` steps."""
+    infected = seeds
+    for _ in range(generations):
+        if infected & demand == demand:
+            return True
+        once = 0
+        twice = 0
+        for x in (infected << 1, infected >> 1, infected << width, infected >> width):
+            twice |= once & x
+            once |= x
+        grown = (infected | twice) & valid
+        if grown == infected:
+            return False
+        infected = grown
+    return infected & demand == demand
+
+
+@njit(cache=True)
+def _search(n, rows, generations, demand, start, prefix, placed, lower, best, floor):
+    """
+    Fewest seeds in a rows×n grid that infect `demand` within `generations`,
+    given `prefix` (`placed` seeds) on cells before `start`. Prunes against
+    and lowers best[0]; returns the best size this search found (or best[0]
+    as it stood on entry).
+    """
+    width = n + 1
+    size = rows * n
+    valid = 0
+    for r in range(rows):
+        valid |= ((1 << n) - 1) << (r * width)
+    suffix = np.zeros(size + 1, np.int64)
+    for i in range(size - 1, -1, -1):
+        suffix[i] = suffix[i + 1] | (1 << ((i // n) * width + i % n))
+
+    found = best[0]
+    cells = np.empty(size + 2, np.int64)
+    seeds = np.empty(size + 2, np.int64)
+    counts = np.empty(size + 2, np.int64)
+    inherited = np.empty(size + 2, np.bool_)
+    cells[0], seeds[0], counts[0], inherited[0] = start, prefix, placed, False
+    top = 1
+    while top > 0:
+        top -= 1
+        i, s, c = cells[top], seeds[top], counts[top]
+        if best[0] < found:
+            found = best[0]
+        if found <= floor:
+            break
+        if c + lower[i // n + 1 if i < size else rows] >= found:
+            continue
+        if not inherited[top] and not _fills(s | suffix[i], valid, demand, width, generations):
+            continue
+        if i == size:
+            found = c
+            if c < best[0]:
+                best[0] = c
+            continue
+        cells[top], seeds[top], counts[top], inherited[top] = i + 1, s, c, False
+        top += 1
+        if c + 1 < found:  # pushed last, so seeded branches are explored first
+            cells[top], seeds[top], counts[top], inherited[top] = i + 1, s | (1 << ((i // n) * width + i % n)), c + 1, True
+            top += 1
+    return found
+
+
+# ---------------------------
+# Search
+# ---------------------------
+
+def _rows_mask(n, first, rows):
+    mask = 0
+    for r in range(max(first, 0), rows):
+        mask |= ((1 << n) - 1) << (r * (n + 1))
+    return mask
+
+
+def _mirror(pattern, n):
+    return int(format(pattern, f"0{n}b")[::-1], 2)
+
+
+def _init(best):
+    global _shared
+    _shared = np.frombuffer(best, dtype=np.int64)
+
+
+def _task(args):
+    n, generations, pattern, lower, floor = args
+    return int(_search(n, n, generations, _rows_mask(n, 0, n), n, pattern, bin(pattern).count("1"),
+                       lower, _shared, floor))
+
+
+class Solver:
+    """K(t) and T(k) for one n; lower-bound tables are memoized per time budget."""
+
+    def __init__(self, n, workers=1):
+        if not 1 <= n <= MAX_N:
+            raise ValueError(f"n must be between 1 and {MAX_N}, got {n}")
+        self.n = n
+        self.workers = workers
+        self.bounds = {}
+        self.seeds = {}  # t -> K(t)
+
+    def lower_bounds(self, generations):
+        """lower[r]: fewest seeds in rows >= r that fill rows >= r + generations (lower[n] = 0)."""
+        if generations not in self.bounds:
+            n = self.n
+            lower = np.zeros(n + 1, dtype=np.int64)
+            for top in range(n - 1, 0, -1):
+                rows = n - top
+                demand = _rows_mask(n, generations, rows)
+                if demand:
+                    # Sub-grid row j is row top + j: shift the table to its frame.
+                    local = np.concatenate([lower[top:], np.zeros(top, dtype=np.int64)])
+                    best = np.array([rows * n + 1], dtype=np.int64)
+                    lower[top] = _search(n, rows, generations, demand, 0, 0, 0, local, best, 0)
+            self.bounds[generations] = lower
+        return self.bounds[generations]
+
+    def min_seeds(self, generations, pool=None, shared=None):
+        """K(generations): the fewest seeds that fill the grid within that many steps."""
+        n = self.n
+        if generations not in self.seeds:
+            upper = self.seeds.get(generations - 1, n * n)
+            lower = self.lower_bounds(generations)
+            if shared is None:
+                shared = multiprocessing.RawArray("q", 1)
+            np.frombuffer(shared, dtype=np.int64)[0] = upper
+            tasks = [(n, generations, p, lower, n) for p in range(1 << n) if p <= _mirror(p, n)]
+            if pool is None:
+                _init(shared)
+                found = [_task(task) for task in tasks]
+            else:
+                found = pool.map(_task, tasks, chunksize=1)
+            self.seeds[generations] = min(found + [upper])
+        return self.seeds[generations]
+
+    def table(self, log=None):
+        """{k: T(k)} for n <= k <= n², with K(t) filled in along the way."""
+        n = self.n
+        shared = multiprocessing.RawArray("q", 1)
+        pool = multiprocessing.Pool(self.workers, _init, (shared,)) if self.workers > 1 else None
+        try:
+            generations = 0
+            while True:
+                start = time.perf_counter()
+                k = self.min_seeds(generations, pool, shared)
+                if log:
+                    log(f"n={n}: K({generations}) = {k}  ({time.perf_counter() - start:.1f} s)")
+                if k <= n:
+                    break
+                generations += 1
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return {k: min(t for t, m in self.seeds.items() if m <= k) for k in range(n, n * n + 1)}
+
+
+def brute_force(n):
+    """{k: T(k)} by simulating every seed subset (n <= 4)."""
+    width = n + 1
+    valid = _rows_mask(n, 0, n)
+    bits = [r * width + c for r in range(n) for c in range(n)]
+    table = {}
+    for k in range(n, n * n + 1):
+        times = []
+        for cells in itertools.combinations(bits, k):
+            seeds = sum(1 << b for b in cells)
+            t = next((t for t in range(n * n) if _fills(seeds, valid, valid, width, t)), None)
+            if t is not None:
+                times.append(t)
+        table[k] = min(times)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exact minimum percolation time for every seed count.")
+    parser.add_argument("--n", nargs="+", type=int, required=True)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--check", action="store_true", help="compare against brute force (n <= 4)")
+    parser.add_argument("--out", help="write {n: {k: T(k)}} as JSON")
+    args = parser.parse_args(argv)
+
+    if not HAVE_NUMBA and max(args.n) > 6:
+        print("Numba is not available; n = 7 will take a long time.", file=sys.stderr)
+    log = lambda msg: print(msg, flush=True)
+    results, status = {}, 0
+    for n in args.n:
+        table = Solver(n, args.workers).table(log)
+        results[n] = table
+        steps = [f"{k}:{t}" for k, t in table.items() if k == n or t < table[k - 1]]
+        print(f"n={n}: T(k) from k = " + "  ".join(steps), flush=True)
+        if args.check and n <= 4:
+            agrees = brute_force(n) == table
+            print(f"n={n}: brute force {'agrees' if agrees else 'DISAGREES'}")
+            status |= not agrees
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""
+Compact binary trajectories: the infected set at every generation of a run.
+
+    record("diag.ptrj", seeds, threshold=2, every=16)
+    traj = Trajectory("diag.ptrj")
+    traj.state(40)                    # boolean grid after generation 40
+    for gen, delta in traj.deltas():  # streamed, one record in memory at a time
+        ...
+
+Layout (little-endian):
+
+    header   magic "PTRJ", version, ndim, threshold, keyframe interval K,
+             generation count, keyframe count, index offset, shape
+    records  one per generation 0..G, in order:
+               u8 kind, u32 payload length, payload
+             kind 0, keyframe (every K-th generation, including 0): the full
+               state as packed bits over flat C-order indices;
+             kind 1, delta: u32 count, then the sorted flat indices of the
+               newly infected cells as LEB128 varints of their gaps
+    index    (generation u32, offset u64) for every keyframe
+
+A state is rebuilt from the nearest keyframe at or before it plus at most
+K - 1 deltas. A delta costs one to three bytes per cell on typical spreads;
+a keyframe costs N/8 bytes for N cells.
+
+Cells use the engine's indexing: [row, col] grids and the [z, row, col]
+cube. export_cells/import_cells convert from and to lists of cell tuples as
+find_next_to_fill and next_infections produce them, with 3D cells in
+cube_slices_trial's (row, col, z) order.
+"""
+import argparse
+import struct
+import sys
+
+import numpy as np
+
+from .cli import parse_spec, resolve_threshold
+from .engine import iter_deltas, never, time_dtype
+
+MAGIC = b"PTRJ"
+VERSION = 1
+KEYFRAME, DELTA = 0, 1
+_HEADER = struct.Struct("<4sBBBxIIIQ")
+_RECORD = struct.Struct("<BI")
+_INDEX = np.dtype([("generation", "<u4"), ("offset", "<u8")])
+
+
+# ---------------------------
+# Varints
+# ---------------------------
+
+def encode_varints(values):
+    """LEB128 bytes for an array of non-negative integers."""
+    values = np.asarray(values, dtype=np.uint64)
+    if values.size == 0:
+        return b""
+    lengths = np.ones(values.size, dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        lengths += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.cumsum(lengths) - lengths
+    owner = np.repeat(np.arange(values.size), lengths)
+    pos = np.arange(owner.size) - starts[owner]
+    out = ((values[owner] >> (np.uint64(7) * pos.astype(np.uint64))) & np.uint64(0x7F)).astype(np.uint8)
+    out[pos < lengths[owner] - 1] |= 0x80
+    return out.tobytes()
+
+
+def decode_varints(data):
+    """Inverse of encode_varints, as a uint64 array."""
+    data = np.frombuffer(data, dtype=np.uint8)
+    if data.size == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    owner = np.repeat(np.arange(ends.size), ends - starts + 1)
+    pos = (np.arange(data.size) - starts[owner]).astype(np.uint64)
+    parts = (data & 0x7F).astype(np.uint64) << (np.uint64(7) * pos)
+    return np.add.reduceat(parts, starts)
+
+
+# ---------------------------
+# Writing
+# ---------------------------
+
+class TrajectoryWriter:
+    """Streams a trajectory to `path`: add() the seeds, then each generation's new cells."""
+
+    def __init__(self, path, shape, threshold=2, every=16):
+        if every < 1:
+            raise ValueError(f"keyframe interval must be at least 1, got {every}")
+        self.shape = tuple(int(s) for s in shape)
+        self.threshold = threshold
+        self.every = every
+        self.size = int(np.prod(self.shape))
+        self.state = np.zeros(self.size, dtype=bool)
+        self.generations = -1
+        self.index = []
+        self.file = open(path, "wb")
+        self.file.write(b"\0" * (_HEADER.size + 4 * len(self.shape)))
+
+    def add(self, cells):
+        """Record the next generation; `cells` are flat indices (generation 0: the seeds)."""
+        cells = np.unique(np.asarray(cells, dtype=np.int64))
+        self.state[cells] = True
+        self.generations += 1
+        if self.generations % self.every == 0:
+            self.index.append((self.generations, self.file.tell()))
+            payload = np.packbits(self.state, bitorder="little").tobytes()
+            kind = KEYFRAME
+        else:
+            gaps = np.diff(cells, prepend=0)
+            payload = struct.pack("<I", cells.size) + encode_varints(gaps)
+            kind = DELTA
+        self.file.write(_RECORD.pack(kind, len(payload)))
+        self.file.write(payload)
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.generations < 0:
+            # Nothing added: record an empty seed set so the file is still readable.
+            self.add([])
+        offset = self.file.tell()
+        self.file.write(np.array(self.index, dtype=_INDEX).tobytes())
+        self.file.seek(0)
+        self.file.write(_HEADER.pack(MAGIC, VERSION, len(self.shape), self.threshold, self.every,
+                                     self.generations, len(self.index), offset))
+        self.file.write(struct.pack(f"<{len(self.shape)}I", *self.shape))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record(path, seeds, threshold=2, every=16):
+    """Simulate `seeds` and stream every generation to `path`; returns the generation count."""
+    seeds = np.asarray(seeds, dtype=bool)
+    with TrajectoryWriter(path, seeds.shape, threshold, every) as out:
+        out.add(np.flatnonzero(seeds))
+        for delta in iter_deltas(seeds, threshold, flat=True):
+            out.add(delta)
+    return out.generations
+
+
+def _engine_cell(cell):
+    # 3D cells come in cube_slices_trial's (row, col, z); the engine wants [z, row, col].
+    return (cell[2], cell[0], cell[1]) if len(cell) == 3 else tuple(cell)
+
+
+def export_cells(path, steps, shape, threshold=2, every=16):
+    """
+    Write a trajectory from lists of cell tuples: steps[0] the seeds, then
+    the cells infected in each generation. `shape` is the engine shape
+    ((n, n) or the (n, n, n) cube).
+    """
+    with TrajectoryWriter(path, shape, threshold, every) as out:
+        for cells in steps:
+            cells = [_engine_cell(c) for c in cells]
+            flat = np.ravel_multi_index(tuple(np.array(cells).T), shape) if cells else []
+            out.add(flat)
+    return out.generations
+
+
+# ---------------------------
+# Reading
+# ---------------------------
+
+class Trajectory:
+    """Random and streaming access to a trajectory file; only the header and index are kept."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, ndim, self.threshold, self.every, self.generations, keys, offset = \
+                _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a version {VERSION} trajectory file")
+            self.shape = struct.unpack(f"<{ndim}I", f.read(4 * ndim))
+            f.seek(offset)
+            self.index = np.frombuffer(f.read(keys * _INDEX.itemsize), dtype=_INDEX)
+        self.size = int(np.prod(self.shape))
+
+    def _records(self, f, offset, count):
+        """(kind, payload) for `count` consecutive records starting at `offset`."""
+        f.seek(offset)
+        for _ in range(count):
+            kind, length = _RECORD.unpack(f.read(_RECORD.size))
+            yield kind, f.read(length)
+
+    def _keyframe(self, payload):
+        return np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=self.size,
+                             bitorder="little").astype(bool)
+
+    @staticmethod
+    def _delta(payload):
+        return np.cumsum(decode_varints(payload[4:])).astype(np.int64)
+
+    def state(self, generation):
+        """Infected grid after `generation` (clamped to the last one)."""
+        generation = min(max(int(generation), 0), self.generations)
+        k = int(np.searchsorted(self.index["generation"], generation, side="right")) - 1
+        start, offset = self.index[k]
+        with open(self.path, "rb") as f:
+            records = self._records(f, int(offset), generation - int(start) + 1)
+            state = self._keyframe(next(records)[1])
+            for _, payload in records:
+                state[self._delta(payload)] = True
+        return state.reshape(self.shape)
+
+    def deltas(self):
+        """Stream (generation, flat indices newly infected); generation 0 yields the seeds."""
+        state = np.zeros(self.size, dtype=bool)
+        with open(self.path, "rb") as f:
+            first = _HEADER.size + 4 * len(self.shape)
+            for gen, (kind, payload) in enumerate(self._records(f, first, self.generations + 1)):
+                if kind == KEYFRAME:
+                    full = self._keyframe(payload)
+                    delta = np.flatnonzero(full & ~state)
+                    state = full
+                else:
+                    delta = self._delta(payload)
+                    state[delta] = True
+                yield gen, delta
+
+    def states(self):
+        """Stream (generation, grid); the grid is one buffer updated in place."""
+        state = np.zeros(self.size, dtype=bool)
+        for gen, delta in self.deltas():
+            state[delta] = True
+            yield gen, state.reshape(self.shape)
+
+    def times(self):
+        """Infection-time array as infection_times() returns it."""
+        dtype = time_dtype(self.size)
+        times = np.full(self.size, never(dtype), dtype=dtype)
+        for gen, delta in self.deltas():
+            times[delta] = gen
+        return times.reshape(self.shape)
+
+
+def import_cells(path):
+    """Inverse of export_cells: a list of cell-tuple lists, one per generation."""
+    traj = Trajectory(path)
+    steps = []
+    for _, delta in traj.deltas():
+        cells = zip(*(i.tolist() for i in np.unravel_index(delta, traj.shape)))
+        steps.append([(r, c, z) for z, r, c in cells] if len(traj.shape) == 3 else list(cells))
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record a run as a compact trajectory file.")
+    parser.add_argument("spec", help="[NAME=]KIND:VALUE as in python -m percolation")
+    parser.add_argument("out", help="trajectory file to write")
+    parser.add_argument("--n", type=int)
+    parser.add_argument("--threshold", type=int)
+    parser.add_argument("--every", type=int, default=16, help="keyframe interval K")
+    args = parser.parse_args(argv)
+    if args.every < 1:
+        parser.error(f"--every must be at least 1, got {args.every}")
+
+    try:
+        _, seeds, threshold = parse_spec(args.spec, args.n)
+        threshold = resolve_threshold(threshold, args.threshold, seeds.ndim)
+    except (ValueError, SyntaxError, OSError) as e:
+        parser.error(str(e))
+    generations = record(args.out, seeds, threshold, args.every)
+    traj = Trajectory(args.out)
+    print(f"{args.out}: shape {traj.shape}, {generations} generations, {len(traj.index)} keyframes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Interactive viewer for trying seed sets before they go into a scene.
+
+    python -m percolation.viewer --n 200
+    python -m percolation.viewer --n 9 --diagonals "[(0,0,5),(5,5,4)]"
+    python -m percolation.viewer --n 9 --results results.db     # race candidates, n / p to cycle
+    python -m percolation.viewer --n 1000 --diagonals "[(0,0,1000)]"
+
+Left click toggles a seed. Keys: space play/pause, left/right step one
+generation, r replay, + / - double or halve the speed, c clear, n / p next
+or previous loaded config (q closes the window, as in any matplotlib figure;
+matplotlib's default bindings for these keys, such as p for pan, are off).
+
+Every change of the seeds re-runs infection_times (compiled when Numba is
+installed) in a background thread while the current run keeps playing; the
+window switches over once the new times are in. Playback only reveals the
+precomputed times (raster.Reveal), so a frame costs one incremental image
+update plus drawing the image. Grids wider than the axes are shown
+block-reduced to about the axes' width in pixels (--max-side to override;
+a block takes its earliest time), which keeps a 1000×1000 grid at about
+30 frames per second. Zooming or panning (the toolbar) re-reduces just the
+visible cells, so at full zoom every cell is drawn; the axes are in cell
+units, so a click toggles the cell under the pointer at any zoom.
+Diagonal configs load through seed_from_diagonals, as the race scenes
+build them.
+"""
+import argparse
+import ast
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from . import jit
+from .core import seed_from_diagonals
+from .engine import grid_from_cells, never
+from .raster import Reveal
+from .results import race_configs
+
+SEED_COLOR = (230, 57, 70, 255)
+BACKGROUND = (24, 24, 24, 255)
+# Bound in _on_key; matplotlib's own bindings for them (pan, zoom history, home) are dropped.
+KEYS = (" ", "left", "right", "r", "+", "=", "-", "c", "n", "p")
+
+
+def _free_keys():
+    for name in plt.rcParams:
+        if name.startswith("keymap."):
+            plt.rcParams[name] = [key for key in plt.rcParams[name] if key not in KEYS]
+
+
+def _run(seeds, threshold):
+    times = jit.infection_times(seeds, threshold)
+    reached = int(np.count_nonzero(times != never(times.dtype)))
+    return times, reached
+
+
+class Viewer:
+    """A matplotlib window playing the spread of an editable n×n seed set."""
+
+    def __init__(self, n, seeds=None, threshold=2, speed=None, fps=30, max_side=None, configs=()):
+        self.n = n
+        self.threshold = threshold
+        self.fps = fps
+        self.speed = speed  # generations per second; None: play any run in about 8 s
+        self.configs = list(configs)
+        self.config = 0
+        self.name = None
+        self.seeds = np.zeros((n, n), dtype=bool) if seeds is None else np.array(seeds, dtype=bool)
+
+        self.reveal = None
+        self.times = None
+        self.last = 0
+        self.window = None  # (r0, r1, c0, c1) of the cells drawn
+        self.reached = 0
+        self.generation = 0.0
+        self.playing = True
+        self._shown = None
+        self._version = 0
+        self._pending = None
+        self._zoomed = False
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        _free_keys()
+        self.fig, self.ax = plt.subplots(figsize=(7, 7.4))
+        self.ax.set_axis_off()
+        # Nothing finer than the axes' pixels can be seen, so draw no more than that.
+        self.max_side = max_side or max(1, int(self.ax.get_window_extent().width))
+        # Data coordinates are cells: column c spans x in [c, c + 1), row r spans y in [r, r + 1).
+        self.image = self.ax.imshow(np.zeros((1, 1, 4), dtype=np.uint8), interpolation="nearest",
+                                    extent=(0, n, 0, n))
+        self.ax.set_xlim(0, n)
+        self.ax.set_ylim(0, n)
+        self.ax.set_autoscale_on(False)  # set_extent must not move the view
+        self.ax.callbacks.connect("xlim_changed", self._on_zoom)
+        self.ax.callbacks.connect("ylim_changed", self._on_zoom)
+        self.status = self.ax.set_title("", fontsize=10, family="monospace")
+        self.fig.canvas.mpl_connect("button_press_event", self._on_click)
+        self.fig.canvas.mpl_connect("key_press_event", self._on_key)
+        self.fig.canvas.mpl_connect("close_event", lambda event: self.close())
+        self.timer = self.fig.canvas.new_timer(interval=max(1, 1000 // fps))
+        self.timer.add_callback(self.tick)
+
+        if self.configs and seeds is None:
+            self.load_config(0)
+        else:
+            self.recompute()
+
+    # Seeds
+
+    def load_diagonals(self, diagonals, name=None):
+        """Replace the seeds by a diagonal config (see core.seed_from_diagonals)."""
+        cells = list(seed_from_diagonals(diagonals, self.n))
+        self.seeds = grid_from_cells(cells, (self.n, self.n))
+        self.name = name
+        self.generation = 0.0
+        self.recompute()
+
+    def load_config(self, i):
+        self.config = i % len(self.configs)
+        config = self.configs[self.config]
+        self.load_diagonals(config["diagonals"], config.get("name"))
+
+    def toggle(self, r, c):
+        self.seeds[r, c] = not self.seeds[r, c]
+        self.name = None
+        self.recompute()
+
+    def recompute(self):
+        """Start timing the current seeds in the background; tick() picks the result up."""
+        self._version += 1
+        self._pending = (self._version, self._executor.submit(_run, self.seeds.copy(), self.threshold))
+
+    # Playback
+
+    def _collect(self):
+        version, future = self._pending
+        if not future.done():
+            return False
+        self._pending = None
+        if version != self._version:
+            return False
+        self.times, self.reached = future.result()
+        reached = self.times != never(self.times.dtype)
+        self.last = int(self.times[reached].max()) if reached.any() else 0
+        self.generation = min(self.generation, self.last)
+        self._reduce()
+        return True
+
+    def visible(self):
+        """(r0, r1, c0, c1): the cells the axes' current limits show."""
+        (x0, x1), (y0, y1) = sorted(self.ax.get_xlim()), sorted(self.ax.get_ylim())
+        c0, c1 = max(int(np.floor(x0)), 0), min(int(np.ceil(x1)), self.n)
+        r0, r1 = max(int(np.floor(y0)), 0), min(int(np.ceil(y1)), self.n)
+        return (r0, max(r1, r0 + 1), c0, max(c1, c0 + 1))
+
+    def _reduce(self):
+        """Rebuild the Reveal for the visible cells, reduced to at most max_side pixels a side."""
+        self._zoomed = False
+        self.window = r0, r1, c0, c1 = self.visible()
+        factor = max(1, -(-max(r1 - r0, c1 - c0) // self.max_side))
+        # Colours stay those of the whole run whatever part of it is shown.
+        self.reveal = Reveal(self.times[r0:r1, c0:c1], max_side=self.max_side,
+                             background=BACKGROUND, vmax=self.last)
+        height, width = self.reveal.image.shape[:2]
+        self.image.set_extent((c0, c0 + width * factor, r0, r0 + height * factor))
+        rows, cols = np.nonzero(self.seeds[r0:r1, c0:c1])
+        self._seed_pixels = (height - 1 - rows // factor, cols // factor)
+        self._shown = None
+
+    def tick(self):
+        """Advance one timer frame; redraws only when the picture changed."""
+        fresh = self._pending is not None and self._collect()
+        if self.reveal is None:
+            return
+        if self._zoomed and self.visible() != self.window:
+            self._reduce()
+            fresh = True
+        last = self.last
+        self.generation = min(self.generation, last)
+        if self.playing and self.generation < last:
+            speed = self.speed or max(last / 8, 4)
+            self.generation = min(self.generation + speed / self.fps, last)
+        shown = int(self.generation)
+        if fresh or shown != self._shown:
+            image = self.reveal.at(shown)
+            image[self._seed_pixels] = SEED_COLOR
+            self.image.set_data(image)
+            self._shown = shown
+            self.status.set_text(self.describe())
+            self.fig.canvas.draw_idle()
+
+    def describe(self):
+        cells = self.n * self.n
+        outcome = "percolates" if self.reached == cells else f"stalls at {100 * self.reached / cells:.1f}%"
+        busy = "  (updating)" if self._pending is not None else ""
+        label = f"{self.name}: " if self.name else ""
+        return (f"{label}generation {int(self.generation)} / {self.last}  ·  "
+                f"{int(self.seeds.sum())} seeds  ·  {outcome}{busy}")
+
+    # Events
+
+    def _on_zoom(self, ax):
+        # Limits change many times during a drag; tick() re-reduces once per frame.
+        self._zoomed = True
+
+    def _on_click(self, event):
+        toolbar = getattr(self.fig.canvas, "toolbar", None)
+        if event.inaxes is not self.ax or event.button != 1 or (toolbar is not None and toolbar.mode):
+            return
+        # Row 0 of the grid is at the bottom (raster.Reveal), one data unit per cell.
+        row, col = int(np.floor(event.ydata)), int(np.floor(event.xdata))
+        if 0 <= row < self.n and 0 <= col < self.n:
+            self.toggle(row, col)
+
+    def _on_key(self, event):
+        last = self.last
+        if event.key == " ":
+            self.playing = not self.playing
+            if self.playing and self.generation >= last:
+                self.generation = 0.0
+        elif event.key in ("right", "left"):
+            self.playing = False
+            step = 1 if event.key == "right" else -1
+            self.generation = float(min(max(int(self.generation) + step, 0), last))
+        elif event.key == "r":
+            self.generation, self.playing = 0.0, True
+        elif event.key in ("+", "="):
+            self.speed = 2 * (self.speed or max(last / 8, 4))
+        elif event.key == "-":
+            self.speed = (self.speed or max(last / 8, 4)) / 2
+        elif event.key == "c":
+            self.seeds[:] = False
+            self.name = None
+            self.recompute()
+        elif event.key in ("n", "p") and self.configs:
+            self.load_config(self.config + (1 if event.key == "n" else -1))
+        else:
+            return
+        self._shown = None  # redraw the status line too
+
+    def show(self):
+        self.timer.start()
+        plt.show()
+
+    def close(self):
+        self.timer.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Click seeds onto a grid and watch them spread.")
+    parser.add_argument("--n", type=int, required=True)
+    parser.add_argument("--diagonals", help='config to start from, e.g. "[(0,0,9)]" (see seed_from_diagonals)')
+    parser.add_argument("--results", help="load DiagonalRace candidates from a percolation.results store")
+    parser.add_argument("--threshold", type=int, default=2)
+    parser.add_argument("--speed", type=float, help="generations per second (default: about 8 s per run)")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--max-side", type=int, help="largest image side drawn (default: the axes' width)")
+    args = parser.parse_args(argv)
+
+    configs = race_configs(args.results, args.n, count=50) if args.results else []
+    if args.diagonals:
+        try:
+            configs.insert(0, {"name": None, "diagonals": ast.literal_eval(args.diagonals)})
+        except (ValueError, SyntaxError) as e:
+            parser.error(f"--diagonals: {e}")
+    Viewer(args.n, threshold=args.threshold, speed=args.speed, fps=args.fps,
+           max_side=args.max_side, configs=configs).show()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Overlapped rendering and encoding for long scenes (FullVideo).
+
+Manim 0.19-0.21 encodes each partial movie through PyAV in the rendering
+process, and PyAV holds the GIL while it encodes: rasterizing and encoding
+take turns, and the partial movies are only concatenated after the last one
+is written. With
+
+    class FullVideo(PipelinedScene): ...
+
+the scene's file writer starts one encoder process instead:
+
+- frames are copied into a ring of SLOTS shared-memory frame buffers and the
+  encoder is told which slot to read; a slot is reused only once the encoder
+  hands it back, so the renderer runs at most SLOTS frames ahead and memory
+  stays bounded;
+- closing a partial movie only queues the end marker, so the encoder is
+  still flushing one animation while the next is rasterized;
+- after each partial movie (cached ones included) the encoder appends it to
+  the scene's movie, so combine_to_movie only waits for the last append.
+
+A scene then takes about max(raster, encode) instead of their sum. Manim 0.18
+already pipes frames to an ffmpeg process and 0.22 pipelines partial movies
+itself; on those, and with the OpenGL renderer, PipelinedScene keeps the
+stock writer.
+"""
+import multiprocessing
+import os
+import queue
+import traceback
+import weakref
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+from manim import Camera, Scene, SceneFileWriter, __version__, config, logger
+from manim.constants import RendererType
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.utils.file_ops import is_gif_format
+
+try:
+    import av
+    from manim.scene.scene_file_writer import to_av_frame_rate
+except ImportError:  # Manim 0.18 writes through an ffmpeg pipe instead
+    av = None
+
+SLOTS = 8
+
+
+def pipelining_supported():
+    """True for the synchronous PyAV writer of Manim 0.19-0.21."""
+    return (av is not None and hasattr(SceneFileWriter, "encode_and_write_frame")
+            and not hasattr(SceneFileWriter, "join_all_encode_jobs"))
+
+
+def stream_settings():
+    """Codec, pixel format and options for partial movies, as SceneFileWriter picks them."""
+    codec, pix_fmt = "libx264", "yuv420p"
+    options = {"an": "1", "crf": "23"}
+    if config.movie_file_extension == ".webm":
+        codec = "libvpx-vp9"
+        options["-auto-alt-ref"] = "1"
+        if config.transparent:
+            pix_fmt = "yuva420p"
+    elif config.transparent:
+        codec, pix_fmt = "qtrle", "argb"
+    return {"codec": codec, "pix_fmt": pix_fmt, "options": options,
+            "rate": to_av_frame_rate(config.frame_rate),
+            "width": config.pixel_width, "height": config.pixel_height}
+
+
+# ---------------------------
+# Encoder process
+# ---------------------------
+
+class _Movie:
+    """The scene's movie, built by appending finished partial movies."""
+
+    def __init__(self):
+        self.output = self.stream = self.path = None
+        self.offset = 0
+        self.files = []
+
+    def append(self, output_path, path):
+        with av.open(path) as movie:
+            source = movie.streams.video[0]
+            if self.output is None:
+                self.path = output_path
+                self.output = av.open(output_path, mode="w")
+                self.output.metadata["comment"] = f"Rendered with Manim Community v{__version__}"
+                self.stream = self.output.add_stream(template=source)
+            end = self.offset
+            for packet in movie.demux(source):
+                if packet.dts is None:  # flushing packet
+                    continue
+                packet.pts += self.offset
+                end = max(end, packet.pts + packet.duration)
+                packet.dts = None  # consecutive files restart their dts; let libav recompute
+                packet.stream = self.stream
+                self.output.mux(packet)
+            self.offset = end
+        self.files.append(path)
+
+    def close(self):
+        if self.output is not None:
+            self.output.close()
+        return self.path, self.files
+
+
+def _encoder(jobs, free, results, shm_name, shape):
+    shm = shared_memory.SharedMemory(shm_name)
+    frames = np.ndarray((SLOTS, *shape), dtype=np.uint8, buffer=shm.buf)
+    container = stream = None
+    movie = _Movie()
+    failed = movie_failed = False
+    try:
+        while True:
+            kind, *args = jobs.get()
+            if kind == "stop":
+                break
+            try:
+                if kind == "frame":
+                    slot, repeat = args
+                    try:
+                        if not failed:
+                            for _ in range(repeat):
+                                # A VideoFrame cannot be reused across encodes.
+                                frame = av.VideoFrame.from_ndarray(frames[slot], format="rgba")
+                                for packet in stream.encode(frame):
+                                    container.mux(packet)
+                    finally:
+                        free.put(slot)
+                elif kind == "combine":
+                    path, files = movie.close()
+                    results.put(("combined", None if movie_failed else path, files))
+                    movie, movie_failed = _Movie(), False
+                elif kind == "append":
+                    if not (failed or movie_failed):
+                        movie.append(*args)
+                elif failed:
+                    continue
+                elif kind == "open":
+                    path, settings = args
+                    container = av.open(path, mode="w")
+                    stream = container.add_stream(settings["codec"], rate=settings["rate"],
+                                                  options=settings["options"])
+                    stream.pix_fmt = settings["pix_fmt"]
+                    stream.width, stream.height = settings["width"], settings["height"]
+                elif kind == "close":
+                    for packet in stream.encode():
+                        container.mux(packet)
+                    container.close()
+                    container = stream = None
+            except Exception:
+                if kind == "append":
+                    movie_failed = True  # the writer falls back to Manim's own concat
+                else:
+                    failed = True
+                results.put(("error", kind, traceback.format_exc()))
+    finally:
+        del frames
+        shm.close()
+
+
+# ---------------------------
+# File writer
+# ---------------------------
+
+def _shutdown(process, jobs, shm):
+    if process.is_alive():
+        jobs.put(("stop",))
+        process.join(10)
+        if process.is_alive():
+            process.terminate()
+    shm.close()
+    shm.unlink()
+
+
+class PipelinedFileWriter(SceneFileWriter):
+    """SceneFileWriter whose partial movies are encoded and concatenated in another process."""
+
+    def __init__(self, renderer, scene_name, **kwargs):
+        super().__init__(renderer, scene_name, **kwargs)
+        self._process = None
+        self._open = False
+        self._posted = 0
+
+    def _start(self):
+        ctx = multiprocessing.get_context()
+        self._shape = (config.pixel_height, config.pixel_width, 4)
+        self._shm = shared_memory.SharedMemory(create=True, size=SLOTS * int(np.prod(self._shape)))
+        self._frames = np.ndarray((SLOTS, *self._shape), dtype=np.uint8, buffer=self._shm.buf)
+        self._jobs, self._free, self._results = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        for slot in range(SLOTS):
+            self._free.put(slot)
+        self._process = ctx.Process(target=_encoder, daemon=True,
+                                    args=(self._jobs, self._free, self._results, self._shm.name, self._shape))
+        self._process.start()
+        self._stop = weakref.finalize(self, _shutdown, self._process, self._jobs, self._shm)
+
+    def _error(self, kind, tb):
+        if kind == "append":
+            logger.warning(f"Background concat failed; Manim will combine the partial movies.\n{tb}")
+            return
+        self._stop()
+        raise RuntimeError(f"partial movie encoder failed:\n{tb}")
+
+    def open_partial_movie_stream(self, file_path=None):
+        if self._process is None:
+            self._start()
+        while not self._results.empty():
+            self._error(*self._results.get()[1:])
+        if file_path is None:
+            file_path = self.partial_movie_files[self.renderer.num_plays]
+        self.partial_movie_file_path = file_path
+        self._jobs.put(("open", str(file_path), stream_settings()))
+        self._open = True
+
+    def write_frame(self, frame_or_renderer, num_frames=1):
+        frame = frame_or_renderer
+        if not self._open or getattr(frame, "shape", None) != self._shape:
+            return super().write_frame(frame_or_renderer, num_frames)
+        while True:  # blocks while the encoder is SLOTS frames behind
+            try:
+                slot = self._free.get(timeout=1)
+                break
+            except queue.Empty:
+                if not self._process.is_alive():
+                    raise RuntimeError("partial movie encoder exited") from None
+        self._frames[slot] = frame
+        self._jobs.put(("frame", slot, num_frames))
+
+    def close_partial_movie_stream(self):
+        self._jobs.put(("close",))
+        self._open = False
+        logger.info(
+            f"Animation {self.renderer.num_plays} : Partial movie file queued for %(path)s",
+            {"path": f"'{self.partial_movie_file_path}'"},
+        )
+        self._post()
+
+    def _post(self):
+        """Queue every partial movie known so far for appending to the scene's movie."""
+        if is_gif_format():
+            return
+        movie = Path(self.movie_file_path)
+        target = str(movie.with_suffix(".part" + movie.suffix))
+        for path in self.partial_movie_files[self._posted:]:
+            if path is not None:
+                self._jobs.put(("append", target, str(path)))
+        self._posted = len(self.partial_movie_files)
+
+    def combine_files(self, input_files, output_file, create_gif=False, includes_sound=False):
+        if self._process is None or create_gif or str(output_file) != str(self.movie_file_path):
+            return super().combine_files(input_files, output_file, create_gif, includes_sound)
+        self._post()
+        self._jobs.put(("combine",))
+        while True:
+            kind, *args = self._results.get()
+            if kind != "error":
+                break
+            self._error(*args)
+        path, files = args
+        self._posted = 0
+        if path is not None and files == [str(f) for f in input_files]:
+            os.replace(path, output_file)
+            return
+        if path is not None and os.path.exists(path):
+            os.remove(path)
+        super().combine_files(input_files, output_file, create_gif, includes_sound)
+
+    def finish(self):
+        try:
+            super().finish()
+        finally:
+            if self._process is not None:
+                self._stop()
+
+
+class PipelinedScene(Scene):
+    """Scene rendered through PipelinedFileWriter where that helps (see module docstring)."""
+
+    def __init__(self, renderer=None, **kwargs):
+        if renderer is None and config.renderer == RendererType.CAIRO and pipelining_supported():
+            renderer = CairoRenderer(
+                file_writer_class=PipelinedFileWriter,
+                camera_class=kwargs.get("camera_class", Camera),
+                skip_animations=kwargs.get("skip_animations", False),
+            )
+        super().__init__(renderer=renderer, **kwargs)
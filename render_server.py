@@ -0,0 +1,325 @@
+"""
+Warm render server for the scene files.
+
+    python render_server.py                                   # watch, re-render changed scenes
+    python render_server.py --workers 2 --port 8765 --quality m
+    python render_server.py --submit infection_video.py DiagonalRace
+
+Worker processes import Manim once and keep it warm between jobs, together
+with Pango's font setup and Manim's on-disk Text/SVG caches. Every job
+re-executes the scene file (and re-imports `percolation`), so saved edits
+are picked up without restarting anything.
+
+Watching: the scene files' mtimes are polled, together with every project
+module they import directly or through each other (percolation,
+pipelined_writer, memory_profile, ...). On save the file is parsed
+and every top-level definition hashed; a scene is re-rendered when its own
+class changed or it uses, directly or through other top-level helpers, a
+name whose definition changed (an import change re-renders every scene).
+A saved project module counts as a change of every name a scene file
+imports from it or from a module that depends on it. Workers drop every
+module loaded from the project directory before each job, so those edits
+are also what the next render runs. Scenes in --skip (FullVideo by default)
+are only rendered on request.
+
+Jobs: one JSON object per line on a local TCP socket,
+{"file": "infection_video.py", "scene": "DiagonalRace", "quality": "l"},
+answered with {"ok": true, "movie": ..., "seconds": ...} or
+{"ok": false, "error": ...}. Several editors can share one pool this way.
+"""
+import argparse
+import ast
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+SCENE_FILES = ["infection_video.py", "cube_slices_trial.py"]
+QUALITIES = {
+    "l": "low_quality", "m": "medium_quality", "h": "high_quality",
+    "p": "production_quality", "k": "fourk_quality",
+}
+DEFAULT_PORT = 8765
+IMPORTS = "<imports>"
+
+
+# ---------------------------
+# Change detection
+# ---------------------------
+
+def definitions(path):
+    """
+    ({top-level name: (source hash, referenced names)}, [scene class names]).
+    Imports are hashed together under IMPORTS.
+    """
+    with open(path) as f:
+        source = f.read()
+    tree = ast.parse(source)
+    defs, scenes, imports = {}, [], []
+    for node in tree.body:
+        segment = ast.get_source_segment(source, node) or ""
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imports.append(segment)
+            continue
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            names = [node.name]
+        elif isinstance(node, ast.Assign):
+            names = [n.id for t in node.targets for n in ast.walk(t) if isinstance(n, ast.Name)]
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            names = [node.target.id]
+        else:
+            continue
+        digest = hashlib.sha1(segment.encode()).hexdigest()
+        refs = {n.id for n in ast.walk(node) if isinstance(n, ast.Name)}
+        for name in names:
+            defs[name] = (digest, refs)
+        if isinstance(node, ast.ClassDef) and any(
+                isinstance(b, ast.Name) and b.id.endswith("Scene") for b in node.bases):
+            scenes.append(node.name)
+    defs[IMPORTS] = (hashlib.sha1("\n".join(imports).encode()).hexdigest(), set())
+    return defs, scenes
+
+
+def dirty_scenes(old, new, scenes, imported=()):
+    """
+    Scenes in `new` whose own definition, or anything they use, differs from
+    `old`, or that use a name in `imported` (names bound from a changed module).
+    """
+    changed = {name for name, (digest, _) in new.items() if old.get(name, (None,))[0] != digest}
+    changed |= set(imported)
+    if IMPORTS in changed or "*" in changed:
+        return list(scenes)
+
+    def uses_changed(name, seen):
+        if name in changed:
+            return True
+        seen.add(name)
+        return any(uses_changed(ref, seen) for ref in new[name][1]
+                   if ref in changed or (ref in new and ref not in seen))
+
+    return [s for s in scenes if uses_changed(s, set())]
+
+
+def module_file(root, name):
+    """Source file of module `name` if it lives under `root`, else None."""
+    base = os.path.join(root, *name.split("."))
+    for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def local_imports(path, root):
+    """{project module file imported by `path`: names the imports bind}."""
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    package = os.path.relpath(os.path.dirname(path), root).split(os.sep)
+    package = [] if package == ["."] else package
+    found = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                source = module_file(root, alias.name)
+                if source:
+                    found.setdefault(source, set()).add(alias.asname or alias.name.split(".")[0])
+        elif isinstance(node, ast.ImportFrom):
+            parts = package[:len(package) - node.level + 1] if node.level else []
+            module = ".".join(parts + ([node.module] if node.module else []))
+            source = module_file(root, module) if module else None
+            if source is None:
+                continue
+            for alias in node.names:
+                # `from package import submodule` depends on the submodule's file.
+                sub = module_file(root, f"{module}.{alias.name}")
+                found.setdefault(sub or source, set()).add(alias.asname or alias.name)
+    return found
+
+
+def dependencies(path, root):
+    """({project module file: names `path` binds from it or its dependents}, all files involved)."""
+    direct = local_imports(path, root)
+    reach = {}
+    for source in direct:
+        seen, todo = set(), [source]
+        while todo:
+            current = todo.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            todo.extend(local_imports(current, root))
+        reach[source] = seen
+    names = {}
+    for source, files in reach.items():
+        for f in files:
+            names.setdefault(f, set()).update(direct[source])
+    return names
+
+
+# ---------------------------
+# Workers
+# ---------------------------
+
+def _init_worker():
+    import manim  # noqa: F401  (the slow import, paid once per worker)
+
+
+def render(path, scene, quality="l"):
+    """Render one scene from a fresh copy of `path`; returns a JSON-able result dict."""
+    start = time.perf_counter()
+    try:
+        from manim import tempconfig
+
+        path = os.path.abspath(path)
+        root = os.path.dirname(path)
+        if root not in sys.path:
+            sys.path.insert(0, root)
+        # Re-import every project module (percolation, pipelined_writer, ...) from disk.
+        keep = {"__main__", "__mp_main__", __name__}
+        for name, module in list(sys.modules.items()):
+            source = getattr(module, "__file__", None)
+            if name not in keep and source and os.path.abspath(source).startswith(root + os.sep):
+                del sys.modules[name]
+        spec = importlib.util.spec_from_file_location(f"_scenes_{time.time_ns()}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        with tempconfig({"quality": QUALITIES[quality], "preview": False, "input_file": path}):
+            instance = getattr(module, scene)()
+            instance.render()
+            movie = str(instance.renderer.file_writer.movie_file_path)
+        return {"ok": True, "file": path, "scene": scene, "movie": movie,
+                "seconds": time.perf_counter() - start}
+    except Exception:
+        return {"ok": False, "file": path, "scene": scene, "error": traceback.format_exc(),
+                "seconds": time.perf_counter() - start}
+
+
+class RenderServer:
+    def __init__(self, workers=1, quality="l", log=print):
+        self.quality = quality
+        self.log = log
+        self.pool = multiprocessing.Pool(workers, _init_worker)
+
+    def submit(self, path, scene, quality=None, callback=None):
+        return self.pool.apply_async(render, (path, scene, quality or self.quality), callback=callback)
+
+    def report(self, result):
+        if result["ok"]:
+            self.log(f"{result['scene']}: {result['seconds']:.1f} s -> {result['movie']}")
+        else:
+            self.log(f"{result['scene']} failed:\n{result['error']}")
+
+    def watch(self, paths, skip=(), interval=0.5):
+        """Poll `paths` and the project modules they import forever, rendering the scenes each save affects."""
+        paths = [os.path.abspath(p) for p in paths]
+        state, deps, mtimes = {}, {}, {}
+
+        def track(path):
+            deps[path] = dependencies(path, os.path.dirname(path))
+            for f in deps[path]:
+                mtimes.setdefault(f, os.path.getmtime(f))
+
+        for path in paths:
+            state[path] = (os.path.getmtime(path), definitions(path)[0])
+            track(path)
+        self.log(f"watching {', '.join(paths)} and {len(mtimes)} project modules")
+        while True:
+            time.sleep(interval)
+            saved = []
+            for f, mtime in list(mtimes.items()):
+                try:
+                    current = os.path.getmtime(f)
+                except OSError:
+                    continue
+                if current != mtime:
+                    mtimes[f] = current
+                    saved.append(f)
+            for path in paths:
+                imported = set().union(*(deps[path].get(f, set()) for f in saved))
+                try:
+                    mtime = os.path.getmtime(path)
+                    if mtime == state[path][0] and not imported:
+                        continue
+                    defs, scenes = definitions(path)
+                    if saved:
+                        track(path)
+                except (OSError, SyntaxError) as e:
+                    # Half-written file or a syntax error: wait for the next save.
+                    self.log(f"{path}: {e}")
+                    continue
+                todo = [s for s in dirty_scenes(state[path][1], defs, scenes, imported) if s not in skip]
+                state[path] = (mtime, defs)
+                for scene in todo:
+                    self.log(f"{path}: re-rendering {scene}")
+                    self.submit(path, scene, callback=self.report)
+
+    def serve(self, port=DEFAULT_PORT):
+        """Accept JSON-line jobs on 127.0.0.1:port (in a background thread)."""
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    try:
+                        job = json.loads(line)
+                        result = server.submit(job["file"], job["scene"], job.get("quality")).get()
+                    except (ValueError, KeyError) as e:
+                        result = {"ok": False, "error": f"bad job: {e}"}
+                    self.wfile.write((json.dumps(result) + "\n").encode())
+                    self.wfile.flush()
+
+        tcp = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        tcp.daemon_threads = True
+        threading.Thread(target=tcp.serve_forever, daemon=True).start()
+        self.log(f"accepting jobs on 127.0.0.1:{port}")
+        return tcp
+
+
+def submit(path, scene, quality="l", port=DEFAULT_PORT):
+    """Send one job to a running server and wait for its result."""
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        job = {"file": os.path.abspath(path), "scene": scene, "quality": quality}
+        conn.sendall((json.dumps(job) + "\n").encode())
+        return json.loads(conn.makefile().readline())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm Manim render server with hot re-render.")
+    parser.add_argument("files", nargs="*", default=SCENE_FILES, help="scene files to watch")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--quality", choices=list(QUALITIES), default="l")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--skip", nargs="*", default=["FullVideo"], help="scenes never re-rendered on save")
+    parser.add_argument("--no-watch", action="store_true", help="only serve socket jobs")
+    parser.add_argument("--submit", nargs=2, metavar=("FILE", "SCENE"), help="send a job to a running server")
+    args = parser.parse_args(argv)
+
+    if args.submit:
+        result = submit(*args.submit, quality=args.quality, port=args.port)
+        print(result["movie"] if result["ok"] else result["error"])
+        return 0 if result["ok"] else 1
+
+    log = lambda msg: print(msg, flush=True)
+    server = RenderServer(args.workers, args.quality, log)
+    server.serve(args.port)
+    try:
+        if args.no_watch:
+            threading.Event().wait()
+        else:
+            server.watch(args.files, set(args.skip))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.pool.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
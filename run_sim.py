@@ -1,5 +1,7 @@
 from manim import *
 
+from percolation.core import find_next_to_fill
+
 class InfectionProblem(Scene):
     def construct(self):
         # Title
@@ -301,24 +303,6 @@ class DiagonalRace(Scene):
         self.play(*all_initial_anims, run_time=0.8)
         self.wait(1)
         
-        def get_neighbors(row, col):
-            neighbors = []
-            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nr, nc = row + dr, col + dc
-                if 0 <= nr < grid_size and 0 <= nc < grid_size:
-                    neighbors.append((nr, nc))
-            return neighbors
-        
-        def find_next_to_fill(filled):
-            to_fill = []
-            for row in range(grid_size):
-                for col in range(grid_size):
-                    if (row, col) not in filled:
-                        filled_neighbors = sum(1 for n in get_neighbors(row, col) if n in filled)
-                        if filled_neighbors >= 2:
-                            to_fill.append((row, col))
-            return to_fill
-        
         generation = 1
         completion_order = []
         
@@ -330,7 +314,7 @@ class DiagonalRace(Scene):
                 if finished[idx]:
                     continue
                 
-                next_to_fill = find_next_to_fill(all_filled[idx])
+                next_to_fill = find_next_to_fill(all_filled[idx], grid_size)
                 
                 if not next_to_fill:
                     finished[idx] = True
@@ -476,24 +460,6 @@ class DiagonalRace9x9(Scene):
         self.play(*all_initial_anims, run_time=0.8)
         self.wait(1)
         
-        def get_neighbors(row, col):
-            neighbors = []
-            for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nr, nc = row + dr, col + dc
-                if 0 <= nr < grid_size and 0 <= nc < grid_size:
-                    neighbors.append((nr, nc))
-            return neighbors
-        
-        def find_next_to_fill(filled):
-            to_fill = []
-            for row in range(grid_size):
-                for col in range(grid_size):
-                    if (row, col) not in filled:
-                        filled_neighbors = sum(1 for n in get_neighbors(row, col) if n in filled)
-                        if filled_neighbors >= 2:
-                            to_fill.append((row, col))
-            return to_fill
-        
         generation = 1
         completion_order = []
         
@@ -505,7 +471,7 @@ class DiagonalRace9x9(Scene):
                 if finished[idx]:
                     continue
                 
-                next_to_fill = find_next_to_fill(all_filled[idx])
+                next_to_fill = find_next_to_fill(all_filled[idx], grid_size)
                 
                 if not next_to_fill:
                     finished[idx] = True